@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# @File ： bench_bulk.py
+# @Time : 2026/10/19 00:35
+# @Author : Zropk
+"""
+批量加解密基准: 多标签的 -e / -d 以单线程 (workers=1) 与默认并发 (worker_count) 执行的耗时对比
+运行: python -m bench.bench_bulk [标签数]
+"""
+import sys
+import time
+
+from bench.common import MiB, make_accounts, run_cli, workspace
+
+PASSWORD = "bench"
+
+
+def timed_cli(base, label: str, *args: str) -> None:
+    """运行一次命令行并输出耗时与最后一行输出"""
+    start = time.perf_counter()
+    result = run_cli(base, *args, "-p", PASSWORD)
+    elapsed = time.perf_counter() - start
+    assert result.returncode == 0, result.stderr
+    message = (result.stdout + result.stderr).strip().splitlines()[-1:] or [""]
+    print(f"{label:42} {elapsed * 1000:10.2f}ms  {message[0][:60]}", flush=True)
+
+
+def main(count: int) -> None:
+    for workers in (1, 0):
+        base = workspace(f"bulk-{workers}")
+        make_accounts(base, count, [("key_datas", 4 * MiB)], workers=workers)
+        label = f"workers={workers or '默认'}"
+        timed_cli(base, f"-e {count} 个标签 ({label})", "-e")
+        timed_cli(base, f"-d {count} 个标签 ({label})", "-d")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# @File ： bench_daemon.py
+# @Time : 2026/10/19 02:10
+# @Author : Zropk
+"""
+常驻模式基准: 同一条命令 (单个标签的加密/解密) 冷启动执行, 与经 IPC 转发给常驻进程执行的耗时对比
+转发包括: launcher.py 轻量客户端 (启动解释器 + IPC) 与进程内直接发送命令 (仅 IPC 往返)
+运行: python -m bench.bench_daemon [账户数]
+"""
+import sys
+import time
+
+from bench.common import make_accounts, measure, report, run_cli, start_cli, workspace
+
+PASSWORD = "bench"
+
+
+def _cycle(base, *extra: str) -> None:
+    for action in ("-d", "-e"):
+        result = run_cli(base, action, "-t", "t0", "-p", PASSWORD, *extra)
+        assert result.returncode == 0, result.stdout + result.stderr
+
+
+def main(count: int) -> None:
+    base = workspace("daemon")
+    make_accounts(base, count)
+    assert run_cli(base, "-e", "-p", PASSWORD).returncode == 0
+
+    from src.ipc import send_command
+
+    print(f"--- {count} 个账户, 每次为解密 + 加密两条命令")
+    report("冷启动 launcher.py", measure(lambda: _cycle(base)))
+
+    daemon = start_cli(base, "--daemon")
+    try:
+        deadline = time.monotonic() + 30
+        while send_command({"action": "ping"}) is None:
+            assert time.monotonic() < deadline, "常驻进程未启动"
+            time.sleep(0.1)
+
+        report("launcher.py 转发给常驻进程", measure(lambda: _cycle(base)))
+
+        def round_trip():
+            for action in ("decrypt", "encrypt"):
+                reply = send_command({"action": action, "tag": "t0", "password": PASSWORD})
+                assert reply and reply["ok"], reply
+
+        report("进程内 IPC 往返", measure(round_trip, repeat=20))
+    finally:
+        send_command({"action": "stop"})
+        daemon.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# @File ： bench_encrypt_all.py
+# @Time : 2026/10/19 00:35
+# @Author : Zropk
+"""
+整个账户文件夹加密 (encrypt_all) 基准: 首次加密、清单命中 (文件未变化, 无需处理) 及解密的耗时
+运行: python -m bench.bench_encrypt_all [标签数]
+"""
+import sys
+
+from bench.bench_bulk import timed_cli
+from bench.common import MiB, make_accounts, workspace
+
+
+def main(count: int) -> None:
+    # 每个账户 key_datas 以外另有 40 个文件
+    files = [("key_datas", 4 * MiB), *((f"D877F783D5D3EF8C/f{i}", 256 * 1024) for i in range(40))]
+    base = workspace("encrypt-all")
+    make_accounts(base, count, files, encrypt_all=True)
+    timed_cli(base, "encrypt_all -e (首次)", "-e")
+    timed_cli(base, "encrypt_all -e (清单命中, 无需处理)", "-e")
+    timed_cli(base, "encrypt_all -d", "-d")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# @File ： bench_index.py
+# @Time : 2026/10/19 00:45
+# @Author : Zropk
+"""
+标签 -> 账户文件夹查询基准 (大量账户): 逐个遍历 (search_file_in_dirs) 与 AccountIndex 的重新扫描、索引命中及未找到缓存对比
+运行: python -m bench.bench_index [账户数]
+"""
+import sys
+
+from bench.common import make_accounts, measure, report, workspace
+
+
+def main(count: int) -> None:
+    base = workspace("index")
+    root = make_accounts(base, count)
+
+    from src.modules.account.account_index import AccountIndex
+    from src.modules.config_manager import ConfigManage
+    from src.modules.utils import search_file_in_dirs
+
+    index, tags = AccountIndex(), ConfigManage().tags
+    probe = [tags[i] for i in range(0, count, max(1, count // 50))]
+
+    print(f"--- {count} 个账户")
+    report("search_file_in_dirs (逐个遍历, 对比)", measure(lambda: search_file_in_dirs(str(root), tags[-1]), repeat=3))
+    report("AccountIndex.find (重新扫描)", measure(lambda: index.find(tags[-1]), repeat=3, setup=index.invalidate))
+    report(f"AccountIndex.find x{len(probe)} (索引命中)", measure(lambda: [index.find(tag) for tag in probe], repeat=20))
+    report("AccountIndex.find (未找到, 缓存)", measure(lambda: index.find("not-found"), repeat=200), unit="us")
+    report("AccountIndex.find (未找到, recheck)", measure(lambda: index.find("not-found", recheck=True), repeat=3))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# @File ： bench_kdf.py
+# @Time : 2026/10/19 00:30
+# @Author : Zropk
+"""
+密钥派生基准: scrypt 首次派生 (清空进程内缓存) 与缓存命中的耗时对比
+运行: python -m bench.bench_kdf
+"""
+from bench.common import measure, report, workspace
+
+PASSWORD = "bench"
+
+
+def main() -> None:
+    base = workspace("kdf")
+    (base / "configs.json").write_text("{}", encoding="utf-8")
+
+    from src.modules.aes_crypto import AESCipher, _KEY_CACHE
+
+    cipher = AESCipher(PASSWORD)
+    report("scrypt 派生 (无缓存)", measure(cipher.key_check, repeat=3, setup=_KEY_CACHE.clear))
+    cipher.key_check()
+    report("scrypt 派生 (缓存命中)", measure(cipher.key_check, repeat=100), unit="us")
+    report("新建 AESCipher + 缓存命中", measure(lambda: AESCipher(PASSWORD).key_check(), repeat=100), unit="us")
+
+
+if __name__ == '__main__':
+    main()
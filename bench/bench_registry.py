@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# @File ： bench_registry.py
+# @Time : 2026/10/19 01:40
+# @Author : Zropk
+"""
+账户注册表基准 (上万个账户): 启动检查 (载入配置, 校验默认账户与目标标签) 及一次完整切换周期的耗时,
+对比启用与不启用注册表; 每次启动前重置各单例, 模拟新进程
+运行: python -m bench.bench_registry [账户数 ...]
+"""
+import sys
+
+from bench.common import make_accounts, measure, report, workspace
+
+PASSWORD = "bench"
+
+
+def main(counts: list[int]) -> None:
+    from src.modules.account.account_index import AccountIndex
+    from src.modules.account.account_operations import account_switch
+    from src.modules.account.registry import AccountRegistry
+    from src.modules.aes_crypto import AESCipher
+    from src.modules.config_manager import ConfigManage
+    from src.modules.encryption_state import EncryptionStateCache
+
+    def fresh():
+        """重置单例, 下次使用时与新进程一样重新载入"""
+        if EncryptionStateCache._instance is not None:
+            EncryptionStateCache().flush()
+        if AccountRegistry._instance is not None:
+            AccountRegistry._instance._conn.close()
+        for cls in (ConfigManage, AccountIndex, AccountRegistry, EncryptionStateCache):
+            cls._instance = None
+
+    for count in counts:
+        tag = f"t{count // 2}"
+        for registry in (False, True):
+            base = workspace(f"registry-{count}")
+            root = make_accounts(base, count, [("key_datas", 512)], registry=registry)
+            fresh()
+            AESCipher(PASSWORD).encrypt(root / f"acc-{count // 2:05d}" / "key_datas")
+
+            def startup():
+                fresh()
+                config = ConfigManage()
+                if config.registry:
+                    AccountRegistry()
+                index = AccountIndex()
+                assert index.find(config.default, recheck=True) and config.has_tag(tag) and index.find(tag, recheck=True)
+
+            def switch():
+                config = ConfigManage()
+                config.pwd, config.tag = PASSWORD, tag
+                assert account_switch("target") and account_switch("restore")
+
+            startup()  # 首次运行建立索引 / 注册表记录, 不计入
+            label = f"{count} 个账户, {'注册表' if registry else 'JSON 索引'}"
+            report(f"启动检查 ({label})", measure(startup, repeat=5))
+            report(f"切换并还原 ({label})", measure(switch, repeat=5))
+            ConfigManage().flush()
+            fresh()
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 20000])
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# @File ： bench_rotate.py
+# @Time : 2026/10/19 00:35
+# @Author : Zropk
+"""
+密钥轮换基准: rekey 单次读写与 "先解密再加密" 两遍读写的对比, 以及 --rotate-key 跨标签的整体耗时
+运行: python -m bench.bench_rotate [大小 MiB ...]
+"""
+import os
+import sys
+import time
+
+from bench.common import MiB, make_accounts, measure, report, run_cli, workspace
+
+PASSWORD, NEW_PASSWORD = "bench", "bench-new"
+ACCOUNTS = 16
+
+
+def timed_cli(base, label: str, *args: str) -> None:
+    """运行一次命令行 (以旧密钥) 并输出耗时与最后一行输出"""
+    start = time.perf_counter()
+    result = run_cli(base, *args, "-p", PASSWORD)
+    elapsed = time.perf_counter() - start
+    assert result.returncode == 0, result.stderr
+    message = (result.stdout + result.stderr).strip().splitlines()[-1:] or [""]
+    print(f"{label:42} {elapsed * 1000:10.2f}ms  {message[0][:60]}", flush=True)
+
+
+def main(sizes: list[int]) -> None:
+    base = workspace("rotate")
+    (base / "configs.json").write_text("{}", encoding="utf-8")
+
+    from src.modules.aes_crypto import AESCipher
+
+    old, new = AESCipher(PASSWORD), AESCipher(NEW_PASSWORD)
+    old.key_check(), new.key_check()
+    path = base / "data"
+
+    for size in sizes:
+        data = os.urandom(size * MiB)
+
+        def encrypted():
+            path.write_bytes(data)
+            old.encrypt(path)
+
+        def two_pass():
+            old.decrypt(path)
+            new.encrypt(path)
+
+        print(f"--- {size} MiB")
+        report("rekey (单次读写)", measure(lambda: old.rekey(path, new), setup=encrypted), size * MiB)
+        report("decrypt + encrypt (两遍, 对比)", measure(two_pass, setup=encrypted), size * MiB)
+
+    cli = workspace("rotate-cli")
+    make_accounts(cli, ACCOUNTS, files=(("key_datas", MiB),))
+    print(f"--- --rotate-key, {ACCOUNTS} 个标签")
+    timed_cli(cli, "-e (准备)", "-e")
+    timed_cli(cli, "--rotate-key", "--rotate-key", NEW_PASSWORD)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1, 16, 64])
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# @File ： bench_snapshot.py
+# @Time : 2026/10/19 00:50
+# @Author : Zropk
+"""
+进程查找基准: 在合成的进程表 (/proc/<pid>/comm) 上, 对比每次查询都重新枚举与 ProcessSnapshot 共享一次枚举的耗时
+合成进程表不依赖本机进程数量, 结果可在不同机器间比较
+运行: python -m bench.bench_snapshot [进程数] [每周期查询次数]
+"""
+import sys
+from pathlib import Path
+
+from bench.common import measure, report, workspace
+
+CLIENT = "Telegram"
+
+
+def make_proc(base: Path, count: int) -> Path:
+    """构建包含 count 个进程的合成 procfs, 其中少量为客户端进程"""
+    root = base / "proc"
+    for pid in range(1, count + 1):
+        (root / str(pid)).mkdir(parents=True)
+        name = CLIENT if pid % 1000 == 0 else f"proc-{pid % 200}"
+        (root / str(pid) / "comm").write_text(f"{name}\n", encoding="utf-8")
+    # 非进程条目
+    for name in ("self", "sys", "meminfo"):
+        (root / name).mkdir()
+    return root
+
+
+def main(count: int, lookups: int) -> None:
+    base = workspace("snapshot")
+
+    from src.modules.process_snapshot import ProcessSnapshot
+
+    snapshot = ProcessSnapshot()
+    snapshot.PROC_ROOT = str(make_proc(base, count))
+    snapshot._use_proc = True
+    names = [CLIENT, *(f"proc-{i}" for i in range(lookups - 1))]
+
+    def rescan_each():
+        for name in names:
+            snapshot.pids(name, force=True)
+
+    def shared():
+        snapshot.refresh(force=True)
+        for name in names:
+            snapshot.pids(name)
+
+    assert len(snapshot.pids(CLIENT, force=True)) == count // 1000
+    print(f"--- 合成进程表 {count} 个进程, 每周期 {lookups} 次查询")
+    report(f"每次查询重新枚举 x{lookups} (对比)", measure(rescan_each, repeat=3))
+    report(f"ProcessSnapshot x{lookups} (共享一次枚举)", measure(shared, repeat=5))
+    report("ProcessSnapshot.pids (快照有效期内)", measure(lambda: snapshot.pids(CLIENT), repeat=200), unit="us")
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    )
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# @File ： bench_startup.py
+# @Time : 2026/10/19 00:55
+# @Author : Zropk
+"""
+命令行启动基准: 无界面模式下 launcher.py 各命令的总耗时 (与空解释器对比), 及导入耗时最多的模块
+--version / --help 须在预算内完成且不导入 PySide6, 超出时以非零状态退出
+运行: python -m bench.bench_startup [预算 ms]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from bench.common import LAUNCHER, make_accounts, report, workspace
+
+# --version / --help 相对空解释器的额外耗时上限 (秒, 中位数)
+STARTUP_BUDGET = 0.3
+
+# 在子进程中运行 launcher.py, 记录对 PySide6 的导入尝试 (未安装时同样能发现)
+GUARDED = r'''
+import os, runpy, sys
+class QtGuard:
+    def find_spec(self, name, path=None, target=None):
+        if name.partition(".")[0] == "PySide6":
+            sys.stderr.write(f"QT-IMPORT {name}\n")
+        return None
+sys.meta_path.insert(0, QtGuard())
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+runpy.run_path(sys.argv[0], run_name="__main__")
+'''
+
+
+def _run(base, args: list[str], repeat: int = 5) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=base, env={**os.environ, "TAS_HEADLESS": "1"}, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def qt_imports(base, *args: str) -> list[str]:
+    """无界面模式下运行命令时尝试导入的 PySide6 模块"""
+    result = subprocess.run(
+        [sys.executable, "-c", GUARDED, str(LAUNCHER), *args],
+        cwd=base,
+        env={**os.environ, "TAS_HEADLESS": "1"},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return [line.split()[1] for line in result.stderr.splitlines() if line.startswith("QT-IMPORT ")]
+
+
+def main(budget: float) -> None:
+    base = workspace("startup")
+    make_accounts(base, 20)
+
+    baseline = _run(base, [sys.executable, "-c", "pass"])
+    report("python -c pass (对比)", baseline)
+    over_budget = []
+    for args in (["--version"], ["--help"], ["--status"], ["--daemon-status"]):
+        timings = _run(base, [sys.executable, str(LAUNCHER), *args])
+        report(f"launcher.py {' '.join(args)}", timings)
+        if args[0] in ("--version", "--help"):
+            extra = statistics.median(timings) - statistics.median(baseline)
+            if extra > budget:
+                over_budget.append(f"{args[0]} 比空解释器多 {extra * 1000:.0f}ms (预算 {budget * 1000:.0f}ms)")
+            if imported := qt_imports(base, *args):
+                over_budget.append(f"{args[0]} 导入了 {', '.join(imported)}")
+
+    # -X importtime 输出到 stderr: "import time: self | cumulative | module"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(LAUNCHER), "--version"],
+        cwd=base,
+        env={**os.environ, "TAS_HEADLESS": "1"},
+        capture_output=True,
+        text=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        modules.append((int(own), name.strip()))
+    print("--- 导入耗时 (模块自身)")
+    for own, name in sorted(modules, reverse=True)[:12]:
+        print(f"{name:42} {own / 1000:10.2f}ms")
+
+    if over_budget:
+        print("--- 超出启动预算", *over_budget, sep="\n")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else STARTUP_BUDGET)
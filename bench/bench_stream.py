@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# @File ： bench_stream.py
+# @Time : 2026/10/19 00:20
+# @Author : Zropk
+"""
+流式加解密基准: v2 容器分块加解密与旧格式整块读入 (AES-ECB + PKCS7) 的吞吐量及峰值内存对比
+峰值内存在独立子进程中测量: tracemalloc 统计 Python 分配, ru_maxrss 统计进程常驻内存的增长
+运行: python -m bench.bench_stream [大小 MiB ...]
+"""
+import os
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+
+from bench.common import MiB, ROOT, measure, report, workspace
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PASSWORD = "bench"
+
+
+def legacy_encrypt(cipher, path: Path) -> None:
+    """旧实现: 整个文件读入内存后填充并以 AES-ECB 加密, 再整体写回"""
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import padding
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+    pad = padding.PKCS7(128).padder()
+    encryptor = Cipher(algorithms.AES(cipher.key), modes.ECB(), backend=default_backend()).encryptor()
+    data = pad.update(path.read_bytes()) + pad.finalize()
+    path.write_bytes(cipher.ENCRYPTION_MARKER + encryptor.update(data) + encryptor.finalize())
+
+
+def _max_rss() -> int:
+    """当前进程的常驻内存峰值 (字节); Linux 下 ru_maxrss 会继承父进程的峰值, 优先读取 VmHWM"""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _peak(method: str, path: str) -> None:
+    """子进程: 执行一次加密并输出 tracemalloc 峰值与常驻内存增长"""
+    from src.modules.aes_crypto import AESCipher
+
+    cipher = AESCipher(PASSWORD)
+    cipher.key_check()
+    baseline = _max_rss()
+    tracemalloc.start()
+    if method == "stream":
+        cipher.encrypt(path)
+    else:
+        legacy_encrypt(cipher, Path(path))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(peak, max(_max_rss() - baseline, 0))
+
+
+def _measure_peak(base: Path, method: str, path: Path) -> tuple[int, int]:
+    result = subprocess.run(
+        [sys.executable, "-m", "bench.bench_stream", "--peak", method, str(path)],
+        cwd=base,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    traced, rss = result.stdout.split()
+    return int(traced), int(rss)
+
+
+def main(sizes: list[int]) -> None:
+    base = workspace("stream")
+    (base / "configs.json").write_text("{}", encoding="utf-8")
+
+    from src.modules.aes_crypto import AESCipher
+
+    cipher = AESCipher(PASSWORD)
+    path = base / "data"
+
+    for size in sizes:
+        data = os.urandom(size * MiB)
+
+        def plain():
+            path.write_bytes(data)
+
+        def encrypted():
+            plain()
+            cipher.encrypt(path)
+
+        print(f"--- {size} MiB")
+        report("encrypt (v2 流式)", measure(lambda: cipher.encrypt(path), setup=plain), size * MiB)
+        report("decrypt (v2 流式)", measure(lambda: cipher.decrypt(path), setup=encrypted), size * MiB)
+        report("encrypt (旧格式整块, 对比)", measure(lambda: legacy_encrypt(cipher, path), setup=plain), size * MiB)
+
+        for method, label in (("stream", "v2 流式"), ("legacy", "旧格式整块")):
+            plain()
+            traced, rss = _measure_peak(base, method, path)
+            print(f"{f'encrypt 峰值内存 ({label})':42} tracemalloc {traced / MiB:8.2f}MiB  RSS 增长 {rss / MiB:8.2f}MiB")
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ["--peak"]:
+        _peak(sys.argv[2], sys.argv[3])
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or [1, 16, 64])
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# @File ： bench_switch.py
+# @Time : 2026/10/19 01:05
+# @Author : Zropk
+"""
+账户切换基准: 切换到目标账户并还原的一个完整周期 (改名模式 / 链接模式), 以及启动时的日志恢复检查
+不启动客户端, 只测量 tdata 的切换及 key_datas 的解密与重新加密
+运行: python -m bench.bench_switch [账户数]
+"""
+import sys
+
+from bench.common import MiB, make_accounts, measure, report, run_cli, workspace
+
+PASSWORD = "bench"
+
+
+def main(count: int) -> None:
+    base = workspace("switch")
+    make_accounts(base, count, [("key_datas", 4 * MiB), ("settingss", 64 * 1024)])
+    assert run_cli(base, "-e", "-p", PASSWORD).returncode == 0
+
+    from src.modules.account.account_operations import account_switch
+    from src.modules.account.switch_journal import SwitchJournal
+    from src.modules.aes_crypto import AESCipher
+    from src.modules.config_manager import ConfigManage
+
+    config = ConfigManage()
+    config.pwd = PASSWORD
+    tags = config.tags
+
+    def cycle():
+        for tag in tags[:10]:
+            config.tag = tag
+            assert account_switch("target")
+            assert account_switch("restore")
+
+    print(f"--- {count} 个账户, 每轮切换 {min(10, count)} 次")
+    for mode in ("rename", "symlink"):
+        config.switch_mode = mode
+        report(f"切换并还原 ({mode})", [t / min(10, count) for t in measure(cycle, repeat=3)])
+
+    journal, cipher = SwitchJournal(), AESCipher(PASSWORD)
+    report("SwitchJournal.recover (无中断)", measure(lambda: journal.recover(cipher), repeat=50), unit="us")
+    config.switch_mode = "rename"
+    config.flush()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
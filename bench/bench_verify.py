@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# @File ： bench_verify.py
+# @Time : 2026/10/19 00:25
+# @Author : Zropk
+"""
+v2 容器完整性校验基准: 校验全部分块、随机抽查分块, 与完整解密 (旧格式只能以此检查) 对比
+运行: python -m bench.bench_verify [大小 MiB ...]
+"""
+import os
+import sys
+
+from bench.common import MiB, measure, report, workspace
+
+PASSWORD = "bench"
+
+
+def main(sizes: list[int]) -> None:
+    base = workspace("verify")
+    (base / "configs.json").write_text("{}", encoding="utf-8")
+
+    from src.modules.aes_crypto import AESCipher
+
+    cipher = AESCipher(PASSWORD)
+    path, dest = base / "data", base / "plain"
+
+    for size in sizes:
+        path.write_bytes(os.urandom(size * MiB))
+        cipher.encrypt(path)
+
+        print(f"--- {size} MiB")
+        report("decrypt_to (完整解密, 对比)", measure(lambda: cipher.decrypt_to(path, dest)), size * MiB)
+        report("verify (全部分块)", measure(lambda: cipher.verify(path)), size * MiB)
+        report("verify (抽查 4 块)", measure(lambda: cipher.verify(path, sample=4), repeat=20))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1, 16, 64])
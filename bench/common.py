@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# @File ： common.py
+# @Time : 2026/10/19 00:20
+# @Author : Zropk
+"""基准测试的公共工具: 构建测试目录、计时与输出"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+ROOT = Path(__file__).resolve().parents[1]
+LAUNCHER = ROOT / "launcher.py"
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+MiB = 1 << 20
+
+
+def workspace(name: str) -> Path:
+    """新建临时工作目录并切换到该目录, ConfigManage 等单例随之使用其中的配置"""
+    base = Path(tempfile.mkdtemp(prefix=f"tas-bench-{name}-"))
+    os.chdir(base)
+    return base
+
+
+def make_accounts(
+        base: Path,
+        count: int,
+        files: Iterable[tuple[str, int]] = (("key_datas", 4096),),
+        **config,
+) -> Path:
+    """
+    构建包含 count 个标签账户的 Telegram 目录及 configs.json
+    每个账户文件夹包含 files 中指定的 (相对路径, 大小) 文件
+    """
+    root = base / "tg"
+    files = list(files)
+    accounts = {"tdata": "main", **{f"acc-{i:05d}": f"t{i}" for i in range(count)}}
+    for folder, marker in accounts.items():
+        (root / folder).mkdir(parents=True)
+        (root / folder / marker).touch()
+        for rel, size in files:
+            path = root / folder / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(os.urandom(size))
+    client = root / "Telegram.exe"
+    client.write_text("#!/bin/sh\n", encoding="utf-8")
+    client.chmod(0o755)
+
+    configs = {
+        "path": str(root),
+        "default": "main",
+        "tags": [f"t{i}" for i in range(count)],
+        "log_output": False,
+        "client": client.name,
+        **config,
+    }
+    (base / "configs.json").write_text(json.dumps(configs), encoding="utf-8")
+    return root
+
+
+def measure(func: Callable, repeat: int = 5, setup: Callable | None = None) -> list[float]:
+    """执行 repeat 次并返回每次的耗时 (秒); setup 在每次计时前执行, 不计入耗时"""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list[float], size: int = 0, unit: str = "ms") -> None:
+    """输出最小值与中位数; 指定 size 时同时输出吞吐量"""
+    best, median = min(timings), statistics.median(timings)
+    scale = 1000 if unit == "ms" else 1_000_000
+    line = f"{label:42} best {best * scale:10.2f}{unit}  median {median * scale:10.2f}{unit}"
+    if size:
+        line += f"  {size / MiB / best:8.1f} MiB/s"
+    print(line, flush=True)
+
+
+def run_cli(base: Path, *args: str) -> subprocess.CompletedProcess:
+    """在工作目录中以无界面模式运行 launcher.py"""
+    return subprocess.run(
+        [sys.executable, str(LAUNCHER), *args],
+        cwd=base,
+        env={**os.environ, "TAS_HEADLESS": "1"},
+        capture_output=True,
+        text=True,
+    )
+
+
+def start_cli(base: Path, *args: str) -> subprocess.Popen:
+    """在工作目录中以无界面模式后台运行 launcher.py (如常驻进程)"""
+    return subprocess.Popen(
+        [sys.executable, str(LAUNCHER), *args],
+        cwd=base,
+        env={**os.environ, "TAS_HEADLESS": "1"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 # @Time : 2025/5/7 13:12
 # @Author : Zropk
+import sys
 
-from src.main import main
+from src.ipc import forward_to_daemon
 
 if __name__ == '__main__':
-    main()
+    # 常驻进程运行时直接转发命令, 跳过完整启动流程
+    exit_code = forward_to_daemon(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
 
+    from src.main import main
+    main()
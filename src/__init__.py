@@ -1,3 +1,9 @@
-from src.main import main
+__all__ = ['main']
 
-__all__ = ['main']
\ No newline at end of file
+
+def __getattr__(name):
+    # 延迟导入, 使 src.ipc 等轻量模块无需加载完整程序
+    if name == 'main':
+        from src.main import main
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# @File ： ipc.py
+# @Time : 2026/10/18 15:30
+# @Author : Zropk
+"""
+常驻进程的本地 IPC
+本模块只依赖标准库, 轻量客户端无需导入 PySide6 等重量级依赖即可转发命令
+"""
+import argparse
+import hashlib
+import os
+import secrets
+import sys
+import tempfile
+from multiprocessing.connection import Client, AuthenticationError
+from pathlib import Path
+
+FAMILY = "AF_PIPE" if sys.platform == "win32" else "AF_UNIX"
+
+
+def daemon_address(base: str | None = None) -> str:
+    """根据工作目录生成常驻进程地址 (Windows 命名管道 / Unix 域套接字)"""
+    base = os.path.abspath(base or os.getcwd())
+    digest = hashlib.sha1(base.encode("utf-8")).hexdigest()[:12]
+    if FAMILY == "AF_PIPE":
+        return rf"\\.\pipe\TAS-{digest}"
+    return os.path.join(tempfile.gettempdir(), f"TAS-{digest}.sock")
+
+
+def authkey_file(base: str | None = None) -> Path:
+    """认证密钥文件, 与 configs.json 位于同一目录"""
+    return Path(base or os.getcwd()) / "daemon.key"
+
+
+def load_authkey(create: bool = False) -> bytes | None:
+    """读取认证密钥, create 为 True 时生成新密钥"""
+    key_file = authkey_file()
+    if create:
+        key = secrets.token_bytes(32)
+        fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+    try:
+        return key_file.read_bytes()
+    except OSError:
+        return None
+
+
+def send_command(command: dict, authkey: bytes | None = None) -> dict | None:
+    """向常驻进程发送命令并返回结果; 常驻进程未运行时返回 None"""
+    authkey = authkey or load_authkey()
+    if not authkey:
+        return None
+    try:
+        conn = Client(daemon_address(), FAMILY, authkey=authkey)
+    except (OSError, AuthenticationError, EOFError):
+        return None
+    with conn:
+        try:
+            conn.send(command)
+            return conn.recv()
+        except (OSError, EOFError):
+            return None
+
+
+def build_command(argv: list[str]) -> dict | None:
+    """将命令行参数转换为常驻进程命令, 不支持的参数返回 None"""
+    # 关闭前缀匹配: 否则 --daemon 会被视为 --daemon-status/--daemon-stop 的歧义缩写而直接退出
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False, exit_on_error=False)
+    parser.add_argument("--encrypt", "-e", action="store_true")
+    parser.add_argument("--decrypt", "-d", action="store_true")
+    parser.add_argument("--switch", "-s", type=str)
+    parser.add_argument("--tag", "-t", type=str)
+    parser.add_argument("--password", "-p", type=str)
+    parser.add_argument("--daemon-status", action="store_true")
+    parser.add_argument("--daemon-stop", action="store_true")
+    parser.add_argument("--headless", action="store_true")
+    try:
+        args, unknown = parser.parse_known_args(argv)
+    except (argparse.ArgumentError, SystemExit):
+        # 部分 Python 版本在 exit_on_error=False 时仍会对个别错误直接退出
+        return None
+    if unknown:
+        return None
+
+    command = {"password": args.password}
+    if args.daemon_status:
+        command["action"] = "status"
+    elif args.daemon_stop:
+        command["action"] = "stop"
+    elif args.switch:
+        command.update(action="switch", tag=args.switch)
+    elif args.encrypt or args.decrypt:
+        command.update(action="encrypt" if args.encrypt else "decrypt", tag=args.tag)
+    else:
+        return None
+    return command
+
+
+def forward_to_daemon(argv: list[str]) -> int | None:
+    """
+    轻量客户端入口: 将命令转发给常驻进程
+    返回退出码; 命令不支持或常驻进程未运行时返回 None, 由调用方走完整启动流程
+    """
+    command = build_command(argv)
+    if command is None:
+        return None
+    reply = send_command(command)
+    if reply is None:
+        return None
+    stream = sys.stdout if reply.get("ok") else sys.stderr
+    if stream is not None:
+        print(reply.get("message", ""), file=stream)
+    return 0 if reply.get("ok") else 1
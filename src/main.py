@@ -5,33 +5,46 @@ import threading
 import datetime
 import argparse
 import asyncio
-import ctypes
 import sys
 import os
 import signal
+import subprocess
 import atexit
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import suppress
 
 from pathlib import Path
 
 from src.modules import (
-    search_file_in_dirs,
+    AccountIndex,
+    AccountRegistry,
+    InstanceManager,
+    SwitchStats,
+    Tracer,
     TASConfigException,
+    TASCipherException,
     AccountSwitcher,
     ProcessManager,
     ProcessMonitor,
     ConfigManage,
+    TASDaemon,
     AESCipher,
+    EncryptionStateCache,
+    format_timedelta,
     recovery,
+    process_folder,
+    folder_files,
+    KeyRotation,
+    SwitchJournal,
     Logger,
 )
-from src.ui import open_help_window, open_settings_window
 
 logger = Logger()
 TITLE = "TAS"
 VERSION = "1.3.0"
 CONFIG = ConfigManage()
-kernel32 = ctypes.WinDLL("kernel32")
+# 各操作跳过标签时的原因
+SKIP_REASONS = {"encrypt": "已加密", "migrate": "已是新格式"}
 
 
 def log_and_exit(mark=False):
@@ -41,9 +54,8 @@ def log_and_exit(mark=False):
             recovery()
         if not CONFIG.log_output:
             return None
-        logger.info(f"监控时长：{CONFIG.watch_time()}.")
-        with open(os.path.join(os.getcwd(), "TAS.log"), "a", encoding="utf-8") as f:
-            f.write(f"{'-' * 20}{datetime.datetime.now()}{'-' * 20}\n")
+        logger.info(f"监控时长：{CONFIG.watch_time()}.", event="session_end")
+        logger.complete()
     return None
 
 
@@ -68,8 +80,8 @@ def handle_global_exception(exc_type, exc_value, exc_traceback):
     )
 
 
-def parse_arguments() -> argparse.Namespace:
-    """参数解析"""
+def build_parser() -> argparse.ArgumentParser:
+    """构建参数解析器"""
     parser = argparse.ArgumentParser(
         description="参数解析器", add_help=False, exit_on_error=False
     )
@@ -94,10 +106,157 @@ def parse_arguments() -> argparse.Namespace:
     exclusive_group.add_argument(
         "--help", "-h", action="store_true", help="获取帮助文档"
     )
+    exclusive_group.add_argument(
+        "--stats", action="store_true", help="查看各阶段耗时统计"
+    )
+    exclusive_group.add_argument(
+        "--status", action="store_true", help="查看各账户的加密状态"
+    )
+    exclusive_group.add_argument(
+        "--migrate", action="store_true", help="将旧格式的加密数据迁移为新的容器格式"
+    )
+    exclusive_group.add_argument(
+        "--verify", type=int, nargs="?", const=0, metavar="chunks",
+        help="校验加密数据的完整性, 可指定每个文件抽查的分块数"
+    )
+    exclusive_group.add_argument(
+        "--rotate-key", type=str, metavar="new_password", help="将所有账户的加密数据更换为新密钥 (-p 指定旧密钥)"
+    )
+    exclusive_group.add_argument(
+        "--launch", type=str, nargs="+", metavar="tag", help="以多开模式启动指定标签的账户"
+    )
+    exclusive_group.add_argument(
+        "--stop", type=str, metavar="tag", help="停止指定标签的多开实例"
+    )
+    exclusive_group.add_argument(
+        "--instances", action="store_true", help="查看多开实例状态"
+    )
+    exclusive_group.add_argument(
+        "--daemon", action="store_true", help="以常驻模式运行"
+    )
+    exclusive_group.add_argument(
+        "--daemon-status", action="store_true", help="查看常驻进程状态"
+    )
+    exclusive_group.add_argument(
+        "--daemon-stop", action="store_true", help="停止常驻进程"
+    )
+    parser.add_argument(
+        "--trace", type=str, metavar="file", help="将本次运行的跟踪数据写入指定文件 (Chrome Trace 格式)"
+    )
+    parser.add_argument(
+        "--headless", action="store_true", help="无界面模式, 消息输出到标准错误"
+    )
     parser.add_argument(
         "--password", "-p", type=str, metavar="password", help="指定解密密钥"
     )
-    return parser.parse_args()
+    return parser
+
+
+def parse_arguments() -> argparse.Namespace:
+    """参数解析"""
+    with Tracer().span("parse_arguments"):
+        return build_parser().parse_args()
+
+
+def open_help_window(version: str) -> None:
+    """打开帮助窗口, 按需加载界面模块"""
+    if Logger.headless:
+        print(f"{TITLE} v{version}\n{build_parser().format_help()}")
+        return
+    from src.ui import open_help_window as _open_help_window
+    _open_help_window(version)
+
+
+def open_settings_window(version: str) -> None:
+    """打开设置窗口, 按需加载界面模块"""
+    if Logger.headless:
+        logger.error("无界面模式下无法打开设置窗口, 请直接编辑配置文件.", popup=True)
+        return
+    from src.ui import open_settings_window as _open_settings_window
+    _open_settings_window(version)
+
+
+def show_stats() -> None:
+    """输出各阶段及各账户的耗时分位数"""
+    report = SwitchStats().report()
+    if sys.stdout is None:
+        logger.info(report, popup=True)
+    else:
+        print(report)
+
+
+def show_status() -> None:
+    """
+    输出各账户的加密状态 (基于加密状态缓存, 文件未变化时每个账户只需一次 stat)
+    启用注册表时附带最近使用时间及次数
+    """
+    index = AccountIndex()
+    registry = AccountRegistry() if CONFIG.registry else None
+    counts = {"已加密": 0, "未加密": 0}
+    lines = []
+    for tag in dict.fromkeys((CONFIG.default, *CONFIG.tags)):
+        folder = index.find(tag)
+        encrypted = AESCipher.encryption_state(os.path.join(CONFIG.path, folder, "key_datas")) if folder else None
+        if not folder:
+            state = "账户文件夹缺失"
+        elif encrypted is None:
+            state = "key_datas 文件缺失"
+        else:
+            state = "已加密" if encrypted else "未加密"
+        counts[state] = counts.get(state, 0) + 1
+        line = f"{tag} ({folder or '-'}): {state}"
+        usage = registry.get(tag) if registry else None
+        if usage and usage["last_used"]:
+            last_used = datetime.datetime.fromtimestamp(usage["last_used"]).strftime("%Y-%m-%d %H:%M")
+            line += f", 最近使用 {last_used} (共 {usage['use_count']} 次)"
+        lines.append(line)
+    EncryptionStateCache().flush()
+
+    lines.append(", ".join(f"{state} {count}" for state, count in counts.items()))
+    report = "\n".join(lines)
+    if sys.stdout is None:
+        logger.info(report, popup=True)
+    else:
+        print(report)
+
+
+def run_instances(tags: list[str]) -> None:
+    """多开模式: 启动并监管指定账户的实例, 全部退出后返回"""
+    unknown = [tag for tag in tags if not CONFIG.has_tag(tag)]
+    if unknown:
+        logger.error(f"未注册的标签: {unknown}", popup=True)
+        return
+
+    async def supervise():
+        stop = asyncio.Event()
+        install_loop_signal_handlers(stop)
+        await InstanceManager().supervise(dict.fromkeys(tags), stop)
+
+    asyncio.run(supervise())
+
+
+def stop_instance(tag: str) -> None:
+    """多开模式: 停止指定实例"""
+    if InstanceManager().stop(tag):
+        logger.info(f"实例 '{tag}' 已停止.", popup=True)
+    else:
+        logger.warning(f"实例 '{tag}' 未运行.", popup=True)
+
+
+def show_instances() -> None:
+    """多开模式: 输出各实例状态"""
+    manager = InstanceManager()
+    manager.recover()
+    lines = [
+        f"{item['tag']}: PID {item['pid']}, 已运行 {format_timedelta(datetime.timedelta(seconds=item['uptime']))}"
+        if item["alive"] else f"{item['tag']}: 启动中"
+        for item in manager.status()
+    ]
+    report = "\n".join(lines) or "没有运行中的实例."
+    if sys.stdout is None:
+        logger.info(report, popup=True)
+    else:
+        print(report)
 
 
 def check_argument() -> str:
@@ -109,6 +268,13 @@ def check_argument() -> str:
 
     if args.password:
         CONFIG.pwd = args.password
+        try:
+            # 更换密钥时由 KeyRotation 校验新旧密钥
+            if not args.rotate_key:
+                CONFIG.verify_key()
+        except TASCipherException as e:
+            logger.error(f"{e.message}, 操作已取消.", popup=True)
+            sys.exit()
 
     # 处理标签指定操作
     if args.tag:
@@ -127,6 +293,26 @@ def check_argument() -> str:
         logger.info(f"{TITLE} v{VERSION}", popup=True)
     elif args.settings:
         open_settings_window(VERSION)
+    elif args.stats:
+        show_stats()
+    elif args.status:
+        show_status()
+    elif args.verify is not None:
+        verify_tags(args.verify)
+    elif args.migrate:
+        process_tags("migrate")
+    elif args.rotate_key:
+        rotate_key(args.rotate_key)
+    elif args.launch:
+        run_instances(args.launch)
+    elif args.stop:
+        stop_instance(args.stop)
+    elif args.instances:
+        show_instances()
+    elif args.daemon:
+        run_daemon()
+    elif args.daemon_status or args.daemon_stop:
+        logger.warning("常驻进程未运行.", popup=True)
     elif args.encrypt:
         process_tags("encrypt")
     elif args.decrypt:
@@ -143,27 +329,37 @@ def _process_tag(tag: str, operation: str, cipher: AESCipher) -> tuple[bool, str
     处理单个标签的加解密操作
     返回: (是否成功, 跳过原因/错误信息)
     """
-    tag_path = search_file_in_dirs(CONFIG.path, tag)
+    tag_path = AccountIndex().find(tag)
     if not tag_path:
         return False, f"标签 '{tag}' 文件缺失"
 
     key_datas_path = Path(CONFIG.path) / tag_path / "key_datas"
+    stats = SwitchStats()
 
     if not key_datas_path.exists():
         return False, f"标签 '{tag}' 的 key_datas 文件不存在"
 
     try:
-        if operation == "encrypt":
-            if AESCipher.is_encrypted(key_datas_path):
-                return False, "已加密"
-            cipher.encrypt(key_datas_path)
-            return True, None
-        else:
-            cipher.decrypt(key_datas_path)
-            return True, None
+        with stats.account(tag):
+            if operation == "encrypt":
+                skipped = AESCipher.is_encrypted(key_datas_path)
+                if not skipped:
+                    cipher.encrypt(key_datas_path)
+            elif operation == "migrate":
+                skipped = not cipher.migrate(key_datas_path)
+            else:
+                skipped = False
+                cipher.decrypt(key_datas_path)
+            # 整个账户文件夹加密: 其余文件只处理自上次运行后发生变化的部分
+            if CONFIG.encrypt_all and (operation == "encrypt" or cipher.verified or CONFIG.key_check):
+                skipped = not process_folder(cipher, key_datas_path.parent, operation) and skipped
+            if skipped:
+                return False, SKIP_REASONS[operation]
     except Exception as e:
         return False, str(e)
 
+    return True, None
+
 
 def process_tags(operation: str) -> None:
     """处理所有标签的加密/解密操作"""
@@ -171,9 +367,19 @@ def process_tags(operation: str) -> None:
         logger.error("未指定密钥.", popup=True)
         sys.exit()
 
+    logger.info(run_tags(operation), popup=True)
+
+
+def run_tags(operation: str) -> str:
+    """并行处理所有标签的加密/解密操作, 返回结果消息"""
     cipher = AESCipher(CONFIG.pwd)
 
+    if operation == "migrate" and not CONFIG.key_check:
+        # 旧格式无法可靠地识别错误的密钥, 迁移前必须确认密钥正确
+        return "尚未记录密钥校验值, 请先使用该密钥成功解密一次后再迁移."
+
     operation_name = {
+        "migrate": "迁移",
         "encrypt": "加密",
         "decrypt": "解密",
     }.get(operation)
@@ -182,20 +388,40 @@ def process_tags(operation: str) -> None:
     skipped_tags = []
     failed_tags = []
 
-    for tag in CONFIG.tags:
-        success, reason = _process_tag(tag, operation, cipher)
-        if success:
-            processed_tags.append(tag)
-        elif reason == "已加密":
-            skipped_tags.append(tag)
-        else:
-            failed_tags.append((tag, reason))
+    tags = CONFIG.tags
+    # OpenSSL 在加解密时会释放 GIL, 线程池即可并行处理 I/O 与加解密
+    with ThreadPoolExecutor(max_workers=max(1, min(CONFIG.worker_count, len(tags)))) as executor:
+        futures = {
+            executor.submit(_process_tag, tag, operation, cipher): tag for tag in tags
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            tag = futures[future]
+            success, reason = future.result()
+            if success:
+                processed_tags.append(tag)
+            elif reason == SKIP_REASONS.get(operation):
+                skipped_tags.append(tag)
+            else:
+                failed_tags.append((tag, reason))
+            logger.info(f"{operation_name}进度 [{done}/{len(tags)}] -> '{tag}'.")
+
+    SwitchStats().flush()
+    EncryptionStateCache().flush()
+    # 有文件被成功解密, 或全部标签均由本次加密时, 可确认密钥正确
+    if cipher.verified or (operation == "encrypt" and processed_tags and not failed_tags and not skipped_tags):
+        CONFIG.remember_key()
+
+    # 保持与配置中的标签顺序一致
+    order = {tag: index for index, tag in enumerate(tags)}
+    processed_tags.sort(key=order.get)
+    skipped_tags.sort(key=order.get)
+    failed_tags.sort(key=lambda item: order[item[0]])
 
     # 生成消息
     if failed_tags:
         msg = f"以下标签操作失败: {failed_tags}"
     elif skipped_tags and not processed_tags:
-        msg = f"以下标签已加密，跳过: {skipped_tags}"
+        msg = f"以下标签{SKIP_REASONS[operation]}，跳过: {skipped_tags}"
     elif not processed_tags:
         msg = f"所有标签均已{operation_name}"
     else:
@@ -203,7 +429,7 @@ def process_tags(operation: str) -> None:
         if skipped_tags:
             msg += f" (已跳过: {skipped_tags})"
 
-    logger.info(msg, popup=True)
+    return msg
 
 
 def process_single_tag(tag: str, operation: str) -> None:
@@ -212,22 +438,118 @@ def process_single_tag(tag: str, operation: str) -> None:
         logger.error("未指定密钥.", popup=True)
         sys.exit()
 
+    level, msg = run_single_tag(tag, operation)
+    logger.log(level, msg, popup=True)
+
+
+def run_single_tag(tag: str, operation: str) -> tuple[str, str]:
+    """
+    处理指定标签的加密/解密操作
+    返回: (日志级别, 结果消息)
+    """
     # 验证标签
-    if tag != CONFIG.default and tag not in CONFIG.tags:
-        logger.error(f"标签 '{tag}' 未注册.", popup=True)
-        sys.exit()
+    if tag != CONFIG.default and not CONFIG.has_tag(tag):
+        return "ERROR", f"标签 '{tag}' 未注册."
 
     cipher = AESCipher(CONFIG.pwd)
     success, reason = _process_tag(tag, operation, cipher)
 
     if success:
+        if cipher.verified:
+            CONFIG.remember_key()
         op_name = "加密" if operation == "encrypt" else "解密"
-        logger.info(f"标签 '{tag}' {op_name}成功.", popup=True)
-    else:
-        if reason == "已加密":
-            logger.warning(f"标签 '{tag}' 已加密，跳过.", popup=True)
-        else:
-            logger.error(f"标签 '{tag}' 操作失败: {reason}", popup=True)
+        return "INFO", f"标签 '{tag}' {op_name}成功."
+    if reason == "已加密":
+        return "WARNING", f"标签 '{tag}' 已加密，跳过."
+    return "ERROR", f"标签 '{tag}' 操作失败: {reason}"
+
+
+def verify_tags(sample: int) -> None:
+    """校验所有标签账户加密数据的完整性"""
+    if not CONFIG.pwd:
+        logger.error("未指定密钥.", popup=True)
+        sys.exit()
+
+    logger.info(run_verify(sample), popup=True)
+
+
+def _verify_tag(tag: str, cipher: AESCipher, sample: int) -> tuple[int, int, str | None]:
+    """
+    校验单个标签账户的加密文件
+    返回: (校验的文件数, 校验的分块数, 错误信息)
+    """
+    folder = AccountIndex().find(tag)
+    if not folder:
+        return 0, 0, f"标签 '{tag}' 文件缺失"
+
+    base = Path(CONFIG.path) / folder
+    files = [base / "key_datas"]
+    if CONFIG.encrypt_all:
+        files += folder_files(base)
+
+    checked = chunks = 0
+    for file in files:
+        if not AESCipher.is_encrypted(file):
+            continue
+        try:
+            chunks += cipher.verify(file, sample)
+        except TASCipherException as e:
+            return checked, chunks, f"{file.relative_to(base)}: {e.message}"
+        checked += 1
+    return checked, chunks, None
+
+
+def run_verify(sample: int) -> str:
+    """并行校验所有标签账户, 返回结果消息"""
+    cipher = AESCipher(CONFIG.pwd)
+    tags = list(dict.fromkeys((CONFIG.default, *CONFIG.tags)))
+    with ThreadPoolExecutor(max_workers=max(1, min(CONFIG.worker_count, len(tags)))) as executor:
+        results = list(executor.map(lambda tag: _verify_tag(tag, cipher, sample), tags))
+
+    failed_tags = [(tag, error) for tag, (_, _, error) in zip(tags, results) if error]
+    files = sum(result[0] for result in results)
+    chunks = sum(result[1] for result in results)
+    if failed_tags:
+        return f"以下标签校验失败: {failed_tags}"
+    return f"校验通过, 共 {files} 个文件, {chunks} 个分块."
+
+
+def rotate_key(new_password: str) -> None:
+    """将所有账户 (含默认账户)的加密数据更换为新密钥"""
+    if not CONFIG.pwd:
+        logger.error("未指定旧密钥.", popup=True)
+        sys.exit()
+    if SwitchJournal().records() or InstanceManager().pids():
+        logger.error("仍有账户处于解密会话中, 请先关闭客户端后再更换密钥.", popup=True)
+        sys.exit()
+
+    logger.info(run_rotate_key(new_password), popup=True)
+
+
+def run_rotate_key(new_password: str) -> str:
+    """各账户 (含默认账户) 并行更换密钥, 返回结果消息"""
+    rotation = KeyRotation(AESCipher(CONFIG.pwd), AESCipher(new_password))
+    try:
+        resumed = rotation.prepare()
+    except TASCipherException as e:
+        return f"{e.message}, 操作已取消."
+    if resumed:
+        logger.info(f"继续未完成的密钥轮换, 已完成 {resumed} 个文件.")
+
+    tags = list(dict.fromkeys((CONFIG.default, *CONFIG.tags)))
+    with ThreadPoolExecutor(max_workers=max(1, min(CONFIG.worker_count, len(tags)))) as executor:
+        results = list(executor.map(rotation.rotate_tag, tags))
+    SwitchStats().flush()
+    EncryptionStateCache().flush()
+
+    failed_tags = [(tag, error) for tag, (_, error) in zip(tags, results) if error]
+    if failed_tags:
+        return f"以下标签更换密钥失败: {failed_tags}, 修复后重新执行即可从中断处继续."
+    try:
+        rotation.finish(tags)
+    except TASCipherException as e:
+        return f"{e.message}, 修复后重新执行即可从中断处继续."
+    return f"密钥已更换, 本次改写 {sum(changed for changed, _ in results)} 个文件."
 
 
 def validate_tag(tag: str) -> str:
@@ -235,11 +557,11 @@ def validate_tag(tag: str) -> str:
     if tag == CONFIG.default:
         return tag
 
-    if tag not in CONFIG.tags:
+    if not CONFIG.has_tag(tag):
         logger.warning(f"未注册的标签: {tag}")
         return CONFIG.default
 
-    if not search_file_in_dirs(CONFIG.path, tag):
+    if not AccountIndex().find(tag, recheck=True):
         logger.warning(f"标签文件缺失 {tag}")
         return CONFIG.default
     return tag
@@ -247,32 +569,36 @@ def validate_tag(tag: str) -> str:
 
 def check_configs() -> bool:
     """配置文件初始化检查"""
-    try:
-        CONFIG.tag = check_argument()
-        client = CONFIG.client
-        path = CONFIG.path
-        default_tdata = CONFIG.default
+    with Tracer().span("check_configs"):
+        try:
+            CONFIG.tag = check_argument()
+            client = CONFIG.client
+            path = CONFIG.path
+            default_tdata = CONFIG.default
 
-        if not os.path.isfile(os.path.join(path, client)):
-            raise TASConfigException("无法找到客户端")
+            if not os.path.isfile(os.path.join(path, client)):
+                raise TASConfigException("无法找到客户端")
 
-        if not os.path.isdir(path):
-            raise TASConfigException("路径格式不正确")
+            if not os.path.isdir(path):
+                raise TASConfigException("路径格式不正确")
 
-        if not default_tdata:
-            raise TASConfigException("默认的账户未设置")
+            if not default_tdata:
+                raise TASConfigException("默认的账户未设置")
 
-        if not search_file_in_dirs(path, default_tdata):
-            raise TASConfigException(
-                f"默认账户配置无效, 标记为'{default_tdata}'的账户文件夹未找到"
-            )
+            if CONFIG.switch_mode not in ("rename", "symlink"):
+                raise TASConfigException(f"切换模式 '{CONFIG.switch_mode}' 无效, 可选 rename / symlink")
 
-        return True
-    except TASConfigException as e:
-        logger.error(f"配置验证失败, {e.message}.", popup=True)
-        return False
-    except Exception as e:
-        raise e
+            if not AccountIndex().find(default_tdata, recheck=True):
+                raise TASConfigException(
+                    f"默认账户配置无效, 标记为'{default_tdata}'的账户文件夹未找到"
+                )
+
+            return True
+        except TASConfigException as e:
+            logger.error(f"配置验证失败, {e.message}.", popup=True)
+            return False
+        except Exception as e:
+            raise e
 
 
 async def status_handler(is_alive: bool) -> None:
@@ -280,24 +606,166 @@ async def status_handler(is_alive: bool) -> None:
     CONFIG.process_status = is_alive
 
 
-def run_async_in_thread(loop, coro) -> None:
-    """启动后台监视器线程"""
-    asyncio.set_event_loop(loop)
+def install_loop_signal_handlers(stop: asyncio.Event) -> None:
+    """将 SIGINT 接入事件循环, 由编排器统一完成还原与退出"""
+    loop = asyncio.get_running_loop()
     try:
-        loop.run_until_complete(coro)
-    finally:
-        loop.close()
+        loop.add_signal_handler(signal.SIGINT, stop.set)
+    except NotImplementedError:
+        # Windows 事件循环不支持 add_signal_handler
+        signal.signal(
+            signal.SIGINT, lambda signum, frame: loop.call_soon_threadsafe(stop.set)
+        )
 
 
-async def watcher(monitor) -> None:
-    """后台进程监控器"""
+async def orchestrate() -> int:
+    """在同一个事件循环中完成启动、监控、还原与配置持久化"""
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    install_loop_signal_handlers(stop)
+
+    monitor = ProcessMonitor(CONFIG.client)
     monitor.add_callback(status_handler)
-    await monitor.start_watching()
-    while True:
-        if CONFIG.complete:
-            await monitor.stop_watching()
-            break
-        await asyncio.sleep(1)
+    switcher = AccountSwitcher(monitor)
+
+    switch_task = asyncio.create_task(switcher.process())
+    stop_task = asyncio.create_task(stop.wait())
+    try:
+        await asyncio.wait({switch_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+        if not switch_task.done():
+            logger.warning("收到中断信号, 正在还原账户...")
+            switch_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await switch_task
+            await switcher.settle()
+            atexit.unregister(log_and_exit)
+            await loop.run_in_executor(None, recovery)
+            log_and_exit()
+        elif switch_task.exception() is not None:
+            raise switch_task.exception()
+    finally:
+        stop_task.cancel()
+        await monitor.stop_watching()
+        await loop.run_in_executor(None, CONFIG.flush)
+        CONFIG.complete = True
+    return 0
+
+
+_DAEMON_SESSION = {"thread": None, "tag": None, "handle": None}
+_DAEMON_LOCK = threading.Lock()
+# 结束会话时等待客户端退出及还原完成的期限 (秒)
+_DAEMON_STOP_TIMEOUT = 30
+
+
+def _prepare_daemon_command(command: dict) -> None:
+    """常驻模式下每条命令前同步配置与密钥"""
+    CONFIG.reload()
+    if CONFIG.registry:
+        AccountRegistry().sync()
+    CONFIG.pwd = command.get("password") or ""
+    CONFIG.verify_key()
+
+
+def _session_alive() -> bool:
+    thread = _DAEMON_SESSION["thread"]
+    return thread is not None and thread.is_alive()
+
+
+def _stop_daemon_session() -> bool:
+    """
+    结束当前会话: 终止本会话启动的客户端并等待还原完成
+    返回会话是否已结束; 超时未结束时保留会话, 以免在还原完成前切换账户
+    """
+    thread, handle = _DAEMON_SESSION["thread"], _DAEMON_SESSION["handle"]
+    if thread is not None and thread.is_alive():
+        if handle is not None:
+            with suppress(OSError):
+                handle.popen.terminate()
+            try:
+                handle.popen.wait(_DAEMON_STOP_TIMEOUT / 2)
+            except subprocess.TimeoutExpired:
+                with suppress(OSError):
+                    handle.popen.kill()
+        thread.join(_DAEMON_STOP_TIMEOUT)
+        if thread.is_alive():
+            logger.error(f"账户 '{_DAEMON_SESSION['tag']}' 的会话未能在 {_DAEMON_STOP_TIMEOUT}s 内结束.")
+            return False
+    _DAEMON_SESSION.update(thread=None, tag=None, handle=None)
+    return True
+
+
+def daemon_switch(command: dict) -> dict:
+    """常驻模式: 切换账户"""
+    with _DAEMON_LOCK:
+        # 先以上一会话自身的密钥完成还原, 再载入新命令的配置与密钥
+        if not _stop_daemon_session():
+            return {"ok": False, "message": "当前会话仍在还原中, 请稍后重试."}
+        _prepare_daemon_command(command)
+        ProcessManager.kill_process(CONFIG.client, exclude=InstanceManager().pids())
+        CONFIG.tag = validate_tag(command.get("tag") or CONFIG.default)
+
+        monitor = ProcessMonitor(CONFIG.client)
+        monitor.add_callback(status_handler)
+        switcher = AccountSwitcher(monitor, password=CONFIG.pwd)
+
+        async def session():
+            try:
+                await switcher.process()
+            finally:
+                if not switcher.launch_future.done():
+                    switcher.launch_future.set_result(None)
+                await monitor.stop_watching()
+                CONFIG.flush()
+
+        thread = threading.Thread(target=asyncio.run, args=(session(),), daemon=True)
+        thread.start()
+        _DAEMON_SESSION.update(thread=thread, tag=CONFIG.tag)
+
+        handle = switcher.launch_future.result()
+        _DAEMON_SESSION["handle"] = handle
+        if not handle:
+            return {"ok": False, "message": f"切换到 '{CONFIG.tag}' 失败."}
+        return {"ok": True, "message": f"已切换为 '{CONFIG.tag}' (PID {handle.pid})."}
+
+
+def daemon_crypto(command: dict) -> dict:
+    """常驻模式: 加密/解密"""
+    with _DAEMON_LOCK:
+        if _session_alive():
+            # 会话进行中修改密钥或重新加载配置会影响其还原
+            return {"ok": False, "message": f"账户 '{_DAEMON_SESSION['tag']}' 的会话进行中, 请先关闭客户端."}
+        _prepare_daemon_command(command)
+        if not CONFIG.pwd:
+            return {"ok": False, "message": "未指定密钥."}
+        operation = command["action"]
+        if command.get("tag"):
+            level, msg = run_single_tag(command["tag"], operation)
+            return {"ok": level != "ERROR", "message": msg}
+        return {"ok": True, "message": run_tags(operation)}
+
+
+def daemon_status(command: dict) -> dict:
+    """常驻模式: 查看状态"""
+    tag = _DAEMON_SESSION["tag"] if _session_alive() else None
+    return {
+        "ok": True,
+        "message": f"常驻进程运行中 (PID {os.getpid()}), 当前账户: {tag or '无'}, "
+                   f"客户端{'运行中' if CONFIG.process_status else '未运行'}.",
+    }
+
+
+def run_daemon() -> None:
+    """以常驻模式运行, 直到收到停止命令"""
+    TASDaemon(
+        {
+            "switch": daemon_switch,
+            "encrypt": daemon_crypto,
+            "decrypt": daemon_crypto,
+            "status": daemon_status,
+        }
+    ).serve()
+    with _DAEMON_LOCK:
+        _stop_daemon_session()
 
 
 def initialize() -> bool:
@@ -328,17 +796,9 @@ def initialize() -> bool:
 
 def main():
     """主函数"""
+    if "--headless" in sys.argv[1:]:
+        Logger.set_headless(True)
     initialize()
-    ProcessManager.kill_process(CONFIG.client)
+    ProcessManager.kill_process(CONFIG.client, exclude=InstanceManager().pids())
 
-    if CONFIG.tag:
-        loop = asyncio.new_event_loop()
-        monitor = ProcessMonitor(CONFIG.client)
-        watch_thread = threading.Thread(target=run_async_in_thread, args=(loop, watcher(monitor)), daemon=True)
-        watch_thread.start()
-        logger.info("监控线程启动成功.")
-
-    AccountSwitcher().process()
-    CONFIG.complete = True
-
-    return 0
+    return asyncio.run(orchestrate())
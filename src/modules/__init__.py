@@ -1,9 +1,19 @@
 from .config_manager import ConfigManage
 from .logger import Logger
 from .aes_crypto import AESCipher
+from .encryption_state import EncryptionStateCache
 from .process_manager import (
     ProcessManager,
-    ProcessMonitor
+    ProcessMonitor,
+    LaunchHandle
+)
+from .process_snapshot import ProcessSnapshot
+from .stats import SwitchStats
+from .tracer import Tracer
+from .readiness import (
+    ReadinessProbe,
+    ProcessExistsProbe,
+    TdataActivityProbe
 )
 from .utils import (
     format_timedelta,
@@ -15,6 +25,13 @@ from .exceptions import (
     TASConfigException,
     TASCipherException
 )
+from .account.account_index import AccountIndex
+from .account.registry import AccountRegistry
+from .account.instances import InstanceManager
+from .account.folder_crypto import process_folder, folder_files
+from .account.rotation import KeyRotation
+from .account.switch_journal import SwitchJournal
+from .daemon import TASDaemon
 from .account.AccountSwitcher import (
     AccountSwitcher,
     recovery
@@ -23,5 +40,8 @@ from .account.AccountSwitcher import (
 __all__ = [
     'ConfigManage', 'search_file_in_dirs', 'is_exists', 'ProcessManager', 'ProcessMonitor',
     'TASException', 'TASConfigException', 'format_timedelta', 'AccountSwitcher', 'Logger',
-    'AESCipher', 'recovery'
+    'AESCipher', 'recovery', 'AccountIndex', 'LaunchHandle', 'ReadinessProbe', 'ProcessExistsProbe',
+    'TdataActivityProbe', 'ProcessSnapshot', 'TASDaemon', 'AccountRegistry',
+    'SwitchStats', 'Tracer', 'InstanceManager', 'EncryptionStateCache',
+    'process_folder', 'folder_files', 'KeyRotation', 'SwitchJournal'
 ]
@@ -6,96 +6,128 @@
 import asyncio
 import atexit
 import os
-import time
+from concurrent.futures import Future
+from contextlib import suppress
 from datetime import datetime
+from functools import partial
 
 from src.modules.account.account_operations import account_switch, recovery
-from src.modules.utils import search_file_in_dirs, is_exists, format_timedelta
-from src.modules.process_manager import ProcessManager
+from src.modules.account.account_index import AccountIndex
+from src.modules.account.instances import InstanceManager
+from src.modules.account.registry import AccountRegistry
+from src.modules.account.switch_journal import SwitchJournal
+from src.modules.aes_crypto import AESCipher
+from src.modules.encryption_state import EncryptionStateCache
+from src.modules.utils import is_exists, format_timedelta
+from src.modules.process_manager import ProcessManager, ProcessMonitor, LaunchHandle
 from src.modules.config_manager import ConfigManage
 from src.modules.logger import Logger
+from src.modules.stats import SwitchStats
 
 
 class AccountSwitcher:
     """账户切换器"""
 
-    def __init__(self):
+    def __init__(self, monitor: ProcessMonitor | None = None, password: str | None = None):
         self.logger = Logger()
         self._config = ConfigManage()
+        self._monitor = monitor
+        # 会话使用创建时的密钥, 之后修改全局配置 (如常驻进程收到新命令) 不影响本次还原
+        self._password = self._config.pwd if password is None else password
+        self._inflight: asyncio.Future | None = None
+        self.launch_future: Future = Future()
 
-    def _cleanup_orphan_folders(self):
-        """清理并恢复孤儿 tdata 文件夹"""
-        path = self._config.path
-        if not path or not os.path.isdir(path):
+    def _recover(self):
+        """根据切换日志恢复上次异常中断的状态"""
+        if not self._config.path or not os.path.isdir(self._config.path):
             return
+        if SwitchJournal().recover(AESCipher(self._password) if self._password else None):
+            self.logger.warning("检测到上次会话未正常还原, 正在切换回默认账户...")
+            account_switch("restore", password=self._password)
 
-        tdata_path = os.path.join(path, "tdata")
-        # 如果 tdata 不存在，尝试找备份恢复
-        if not os.path.exists(tdata_path):
-            for entry in os.scandir(path):
-                if entry.is_dir() and entry.name.startswith("tdata-"):
-                    try:
-                        self.logger.warning(
-                            f"检测到异常中断，正在从 {entry.name} 恢复..."
-                        )
-                        os.rename(entry.path, tdata_path)
-                        return  # 恢复一个即可
-                    except OSError:
-                        continue
+    async def _run_blocking(self, func, *args):
+        """在线程池中执行阻塞操作; 任务被取消时操作仍会执行完毕, 可通过 settle 等待"""
+        self._inflight = asyncio.get_running_loop().run_in_executor(None, func, *args)
+        return await asyncio.shield(self._inflight)
 
-    def process(self):
+    async def settle(self):
+        """等待正在执行的阻塞操作结束"""
+        if self._inflight is not None:
+            with suppress(Exception):
+                await self._inflight
+
+    async def process(self):
         """账户切换器启动函数"""
-        self._cleanup_orphan_folders()  # 启动时先自愈
+        await self._run_blocking(self._recover)  # 启动时先自愈
         tag = self._config.tag
         self._config.has_backup = os.path.isfile(
             os.path.join(
                 self._config.path,
-                search_file_in_dirs(self._config.path, self._config.tag),
+                AccountIndex().find(self._config.tag),
                 "key_datas.bak",
             )
         )
         try:
-            if not asyncio.run(self.__process(tag)):
-                self.logger.error("客户端启动超时.")
+            handle = await self._run_blocking(self._launch, tag)
+            self.launch_future.set_result(handle)
+            if not handle:
+                self.logger.error("客户端启动失败.")
                 return False
+            if self._monitor is not None:
+                self._monitor.attach(handle)
+                await self._monitor.start_watching()
             if is_exists(os.path.join(self._config.path, "tdata"), "main"):
                 self.logger.info("客户端启动成功.")
                 return True
         except Exception as e:
             self.logger.exception("", e)
             return True
+        finally:
+            if not self.launch_future.done():
+                self.launch_future.set_result(None)
         self.logger.info("客户端启动成功, 状态监控器运行中...")
         self._config.start_time = datetime.now()
-        while True:
-            if not self._config.process_status:
-                account_switch("restore")
-                break
-            time.sleep(0.1)
+        if self._monitor is not None:
+            returncode = await asyncio.wrap_future(handle.exit_future)
+        else:
+            returncode = await self._run_blocking(handle.wait)
+        self.logger.info(f"客户端已退出, 退出码: {returncode}.")
+        await self._run_blocking(partial(account_switch, "restore", password=self._password))
+        SwitchStats().flush()
+        EncryptionStateCache().flush()
         return True
 
-    async def __process(self, tag: str) -> bool:
-        """账户切换器工作函数"""
+    def _launch(self, tag: str) -> LaunchHandle | None:
+        """切换账户并启动客户端"""
         process_manager = ProcessManager()
-        tags = self._config.tags
+
+        # 与多开模式拒绝单开中的账户相对应: 多开实例运行中的账户不能再切换到 tdata
+        target = tag if self._config.has_tag(tag) else self._config.default
+        if InstanceManager().running(target):
+            self.logger.error(f"账户 '{target}' 正以多开实例运行, 请先停止该实例 (--stop {target}).")
+            return None
 
         # 处理默认账户或未定义标签
-        if tag not in tags:
+        if not self._config.has_tag(tag):
             tag_exists = is_exists(
                 os.path.join(self._config.path, "tdata"), self._config.default
             )
-            if account_switch(method="restore", tag_in_folder=tag_exists):
+            if account_switch(method="restore", tag_in_folder=tag_exists, password=self._password):
                 return process_manager.start_process(self._config)
             else:
                 self.logger.error("切换默认账户失败.")
-                return False
+                return None
 
         # 尝试切换到目标账户并启动
         if account_switch(
             method="target",
             tag_in_folder=is_exists(os.path.join(self._config.path, "tdata"), tag),
+            password=self._password,
         ):
             self.logger.info(f"已切换为目标账户 -> '{tag}'.")
+            if self._config.registry:
+                AccountRegistry().touch(tag)
             return process_manager.start_process(self._config)
         else:
             self.logger.error(f"切换到目标账户 '{tag}' 失败.")
-            return False
+            return None
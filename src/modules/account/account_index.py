@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# @File ： account_index.py
+# @Time : 2026/10/18 10:12
+# @Author : Zropk
+import json
+import os
+from contextlib import suppress
+from threading import RLock
+from typing import Dict, Set
+
+from src.modules.account import tdata_link
+from src.modules.config_manager import ConfigManage
+from src.modules.tracer import Tracer
+
+
+class AccountIndex:
+    """
+    账户索引, 记录标签标记文件所在的账户文件夹
+    启用注册表时以注册表中的记录为准 (核对标记文件后直接返回), 不再载入及重写整个索引文件
+    """
+
+    _instance = None
+    _lock = RLock()
+
+    def __new__(cls):
+        with cls._lock:
+            if not cls._instance:
+                cls._instance = super().__new__(cls)
+                cls._instance.__initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """初始化"""
+        if self.__initialized:
+            return
+
+        self._config = ConfigManage()
+        self._index_path = self._config.config_file.with_name("accounts_index.json")
+        self._base: str = ""
+        self._mtime: int | None = None
+        self._folders: Dict[str, str] = {}
+        # 上次扫描时未找到的标签, 目录未变化前不再重新扫描
+        self._missing: Set[str] = set()
+        self._registry = None
+
+        if self._config.registry:
+            from src.modules.account.registry import AccountRegistry
+            self._registry = AccountRegistry()
+        else:
+            self._load_index()
+        self.__initialized = True
+
+    def _load_index(self) -> None:
+        """加载持久化索引"""
+        with suppress(OSError, json.JSONDecodeError, TypeError, ValueError):
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            self._base = str(loaded["path"])
+            self._mtime = int(loaded["mtime_ns"])
+            self._folders = {str(k): str(v) for k, v in loaded["folders"].items()}
+            self._missing = {str(tag) for tag in loaded.get("missing", [])}
+
+    def _save_index(self) -> None:
+        """保存索引 (仅作缓存, 写入失败不影响功能)"""
+        temp_file = self._index_path.with_suffix(".tmp")
+        with suppress(OSError):
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "path": self._base,
+                        "mtime_ns": self._mtime,
+                        "folders": self._folders,
+                        "missing": sorted(self._missing),
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(temp_file, self._index_path)
+
+    @staticmethod
+    def _dir_mtime(base: str) -> int | None:
+        try:
+            return os.stat(base).st_mtime_ns
+        except OSError:
+            return None
+
+    def _scan(self, base: str, extra: str = "") -> None:
+        """扫描一次客户端目录并重建索引"""
+        markers = {marker for marker in (*self._config.tags, self._config.default, extra) if marker}
+        folders = {}
+        mtime = self._dir_mtime(base)
+        with Tracer().span("index_scan", markers=len(markers)), suppress(PermissionError, OSError):
+            for entry in os.scandir(base):
+                # 跳过 tdata 链接, 只索引真实的账户文件夹
+                if not entry.is_dir() or tdata_link.is_link(entry.path):
+                    continue
+                with suppress(PermissionError, OSError):
+                    for name in markers.intersection(os.listdir(entry.path)):
+                        if name not in folders and os.path.isfile(os.path.join(entry.path, name)):
+                            folders[name] = entry.name
+
+        self._base, self._mtime, self._folders = base, mtime, folders
+        self._missing = markers.difference(folders)
+        if self._registry is not None:
+            self._registry.set_folders(folders)
+        else:
+            self._save_index()
+
+    def _is_fresh(self, base: str) -> bool:
+        return self._base == base and self._mtime is not None and self._mtime == self._dir_mtime(base)
+
+    def find(self, tag: str, recheck: bool = False) -> str:
+        """
+        返回包含标签标记文件的文件夹名称, 未找到时返回空字符串
+        未找到的结果在客户端目录变化前一直有效; 标记文件放入已有文件夹不会改变目录的修改时间,
+        报告标签缺失前应指定 recheck 重新扫描
+        """
+        base = self._config.path
+        if not base or not tag or not os.path.isdir(base):
+            return ""
+
+        with self._lock:
+            if self._registry is not None:
+                folder = self._registry.folder(tag)
+                if folder and self._has_marker(base, folder, tag):
+                    return folder
+            if self._is_fresh(base):
+                if tag in self._missing and not recheck:
+                    return ""
+                folder = self._folders.get(tag)
+                if folder and os.path.isfile(os.path.join(base, folder, tag)):
+                    return folder
+            self._scan(base, tag)
+            return self._folders.get(tag, "")
+
+    @staticmethod
+    def _has_marker(base: str, folder: str, tag: str) -> bool:
+        """账户文件夹 (非 tdata 链接) 中是否仍有标签标记文件"""
+        return os.path.isfile(os.path.join(base, folder, tag)) and not tdata_link.is_link(os.path.join(base, folder))
+
+    def rename(self, src: str, dst: str) -> None:
+        """重命名账户文件夹并同步更新索引"""
+        base = self._config.path
+        if not src:
+            raise FileNotFoundError("账户文件夹不存在")
+        with self._lock:
+            fresh = self._is_fresh(base)
+            os.rename(os.path.join(base, src), os.path.join(base, dst))
+            for marker, folder in self._folders.items():
+                if folder == src:
+                    self._folders[marker] = dst
+            if self._registry is not None:
+                self._registry.rename_folder(src, dst)
+            if fresh:
+                self._mtime = self._dir_mtime(base)
+                if self._registry is None:
+                    self._save_index()
+
+    def invalidate(self) -> None:
+        """使索引失效, 下次查询时重新扫描"""
+        with self._lock:
+            self._mtime = None
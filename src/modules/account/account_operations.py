@@ -10,37 +10,62 @@ from contextlib import suppress
 from pathlib import Path
 from typing import Literal
 
-from src.modules.utils import search_file_in_dirs
+from src.modules.account import tdata_link
+from src.modules.account.account_index import AccountIndex
+from src.modules.account.key_session import ENCRYPTED_SUFFIX, open_key_datas, close_key_datas
+from src.modules.account.switch_journal import SwitchJournal
 from src.modules.process_manager import ProcessManager
 from src.modules.aes_crypto import AESCipher
 from src.modules.config_manager import ConfigManage
 from src.modules.exceptions import TASException, TASCipherException
+from src.modules.stats import SwitchStats
 
 
 def account_switch(
         method: Literal["restore", "target"],
         tag_in_folder: bool = False,
         max_retries: int = 5,
+        password: str | None = None,
 ):
-    """控制账户的切换与还原"""
+    """控制账户的切换与还原; password 为 None 时使用配置中的密钥"""
     configs = ConfigManage()
-    cipher = AESCipher(configs.pwd)
+    stats = SwitchStats()
+    cipher = AESCipher(configs.pwd if password is None else password)
+    with stats.account(configs.tag), stats.phase("switch" if method == "target" else "restore"):
+        return _account_switch(configs, cipher, method, tag_in_folder, max_retries)
+
+
+def _account_switch(
+        configs: ConfigManage,
+        cipher: AESCipher,
+        method: Literal["restore", "target"],
+        tag_in_folder: bool,
+        max_retries: int,
+):
+    """按重试次数执行切换或还原"""
 
     for attempt in range(max_retries):
         try:
             if tag_in_folder:
                 with suppress(TASCipherException):
-                    tag_path = Path(configs.path) / search_file_in_dirs(
-                        configs.path, configs.tag
-                    )
-                    cipher.decrypt(tag_path / "key_datas")
+                    tag_path = Path(configs.path) / AccountIndex().find(configs.tag)
+                    open_key_datas(cipher, tag_path / "key_datas")
                     configs.decrypted = True
-                    return ProcessManager.start_process(configs)
+                    SwitchJournal().commit(tag=configs.tag, decrypted=True)
+                    return True
 
-            method_func = {
-                "restore": switch_to_default,
-                "target": switch_to_target,
-            }.get(method)
+            if configs.switch_mode == "symlink":
+                method_func = {
+                    "restore": link_to_default,
+                    "target": link_to_target,
+                }.get(method)
+            else:
+                # 由链接模式切回时, 先将 tdata 链接还原为真实文件夹
+                _materialize_tdata(configs.path)
+                method_func = {
+                    "restore": switch_to_default,
+                    "target": switch_to_target,
+                }.get(method)
 
             if not method_func:
                 raise TASException(f"模式 '{method}' 未定义")
@@ -69,105 +94,205 @@ def account_switch(
 def switch_to_default(configs: ConfigManage, cipher: AESCipher, temp: str):
     """切换回默认账户"""
     path = configs.path
-    with suppress(FileNotFoundError, TASCipherException, PermissionError):
-        # 尝试备份或加密当前tdata
-        if configs.decrypted:
-            cipher.encrypt(os.path.join(path, "tdata", "key_datas"))
-        elif configs.has_backup:
-            shutil.move(
-                os.path.join(path, "tdata", "key_datas.bak"),
-                os.path.join(path, "tdata", "key_datas"),
-            )
+    index = AccountIndex()
+    journal = SwitchJournal()
+    # 会话状态同时写入 begin, 中断于第一步之前时仍可据此还原
+    journal.begin(
+        "default", default=index.find(configs.default), temp=temp,
+        decrypted=configs.decrypted, has_backup=configs.has_backup,
+    )
+    journal.step("backup", decrypted=configs.decrypted, has_backup=configs.has_backup)
+    _seal_tdata(configs, cipher)
 
     try:
         # 重命名当前tdata为临时名称
-        os.rename(os.path.join(path, "tdata"), os.path.join(path, temp))
+        journal.step("rename_out", src="tdata", dst=temp)
+        with SwitchStats().phase("rename"):
+            index.rename("tdata", temp)
     except FileNotFoundError:
         pass
     except PermissionError:
+        journal.commit()
         return False
 
     try:
         # 重命名默认账户为tdata
-        os.rename(
-            os.path.join(path, search_file_in_dirs(path, configs.default)),
-            os.path.join(path, "tdata"),
-        )
+        default_folder = index.find(configs.default)
+        journal.step("rename_in", src=default_folder, dst="tdata")
+        with SwitchStats().phase("rename"):
+            index.rename(default_folder, "tdata")
+        journal.commit()
         return True
     except FileNotFoundError:
         # 恢复原始tdata
         if os.path.exists(os.path.join(path, temp)):
             with suppress(OSError):
-                os.rename(os.path.join(path, temp), os.path.join(path, "tdata"))
+                index.rename(temp, "tdata")
+        journal.commit()
         return False
     except PermissionError:
         # 尝试回滚
         if os.path.exists(os.path.join(path, temp)):
             with suppress(OSError):
-                os.rename(os.path.join(path, temp), os.path.join(path, "tdata"))
+                index.rename(temp, "tdata")
+        journal.commit()
         return False
 
 
 def switch_to_target(configs: ConfigManage, cipher: AESCipher, temp: str):
     """切换为目标账户"""
     path = configs.path
+    index = AccountIndex()
 
     try:
-        target_dir = Path(path) / search_file_in_dirs(path, configs.tag)
+        target_dir = Path(path) / index.find(configs.tag)
     except TypeError:
         return False
 
     if target_dir == os.path.join(path, "tdata"):
         return True
 
+    journal = SwitchJournal()
+    journal.begin("target", target=target_dir.name, temp=temp)
+    try:
+        _open_target(configs, cipher, target_dir, journal)
+
+        try:
+            # 重命名当前tdata为临时名称
+            default_folder = index.find(configs.default)
+            journal.step("rename_out", src=default_folder, dst=temp)
+            with SwitchStats().phase("rename"):
+                index.rename(default_folder, temp)
+        except FileNotFoundError:
+            pass  # 可能是首次切换
+
+        # 重命名目标账户为tdata
+        journal.step("rename_in", src=target_dir.name, dst="tdata")
+        with SwitchStats().phase("rename"):
+            index.rename(target_dir.name, "tdata")
+    except Exception as e:
+        # 回滚已完成的步骤并提交日志, 否则下次重试开始新日志时解密记录将丢失
+        _abort_target(configs, cipher, journal)
+        if isinstance(e, (FileNotFoundError, PermissionError)):
+            return False
+        raise
+
+    journal.commit(tag=configs.tag, decrypted=configs.decrypted, has_backup=configs.has_backup)
+    return True
+
+
+def _abort_target(configs: ConfigManage, cipher: AESCipher, journal: SwitchJournal):
+    """切换失败时还原文件夹名称并重新加密目标账户"""
+    with SwitchStats().phase("rollback"):
+        journal.rollback(cipher)
+    configs.decrypted = False
+    configs.has_backup = False
+
+
+def _seal_tdata(configs: ConfigManage, cipher: AESCipher):
+    """重新加密当前 tdata 的 key_datas, 或以备份还原"""
+    tdata = os.path.join(configs.path, "tdata")
+    key_datas = os.path.join(tdata, "key_datas")
+    with SwitchStats().phase("backup"), suppress(FileNotFoundError, TASCipherException, PermissionError):
+        if configs.decrypted:
+            close_key_datas(cipher, key_datas)
+        elif configs.has_backup:
+            shutil.move(f"{key_datas}.bak", key_datas)
+        elif os.path.exists(key_datas + ENCRYPTED_SUFFIX):
+            # 未指定密钥时, 未被修改的临时明文仍可直接丢弃
+            close_key_datas(None, key_datas)
+
+
+def _open_target(configs: ConfigManage, cipher: AESCipher, target_dir: Path, journal: SwitchJournal):
+    """解密目标账户的 key_datas; 无法解密时保留备份"""
+    journal.step("decrypt")
     try:
-        cipher.decrypt(os.path.join(target_dir, "key_datas"))
+        open_key_datas(cipher, os.path.join(target_dir, "key_datas"))
         configs.decrypted = True
+        if cipher.verified:
+            configs.remember_key(cipher)
     except TASCipherException:
-        shutil.copy2(
-            os.path.join(target_dir, "key_datas"),
-            os.path.join(target_dir, "key_datas.bak"),
-        )
+        journal.step("decrypt", backup=True)
+        with SwitchStats().phase("backup"):
+            shutil.copy2(
+                os.path.join(target_dir, "key_datas"),
+                os.path.join(target_dir, "key_datas.bak"),
+            )
         configs.has_backup = True
 
-    try:
-        # 重命名当前tdata为临时名称
-        os.rename(
-            os.path.join(path, search_file_in_dirs(path, configs.default)),
-            os.path.join(path, temp),
-        )
-    except FileNotFoundError:
-        pass  # 可能是首次切换
-    except PermissionError:
-        return False
 
-    try:
-        # 重命名目标账户为tdata
-        os.rename(target_dir, os.path.join(path, "tdata"))
-        return True
-    except (FileNotFoundError, PermissionError):
-        # 尝试回滚
-        _rollback_rename(path, configs.default, temp)
-        return False
+def _adopt_tdata(path: str, temp: str):
+    """首次使用链接模式时, 将真实的 tdata 文件夹改名并替换为链接"""
+    if tdata_link.read_link(path) is not None or not os.path.isdir(os.path.join(path, "tdata")):
+        return
+    temp_link = tdata_link.temp_link_name()
+    journal = SwitchJournal()
+    journal.begin("adopt", folder=temp, temp_link=temp_link)
+    tdata_link.adopt(path, temp, temp_link)
+    journal.commit()
 
 
-def _rollback_rename(path: str, default_tag: str, temp: str):
-    """回滚重命名操作"""
-    try:
-        # 尝试恢复原始tdata
-        temp_path = os.path.join(path, temp)
-        default_path = os.path.join(path, search_file_in_dirs(path, default_tag))
-        target_path = os.path.join(path, "tdata")
+def _materialize_tdata(path: str):
+    """切回重命名模式时, 将 tdata 链接还原为真实文件夹; 删除链接与改名之间中断时由日志恢复"""
+    folder = tdata_link.read_link(path)
+    if folder is None:
+        return
+    journal = SwitchJournal()
+    journal.begin("materialize", folder=folder)
+    tdata_link.materialize(path)
+    AccountIndex().invalidate()
+    journal.commit()
+
+
+def link_to_default(configs: ConfigManage, cipher: AESCipher, temp: str):
+    """链接模式: 切换回默认账户"""
+    path = configs.path
+    _adopt_tdata(path, temp)
+    default_folder = AccountIndex().find(configs.default)
+    current = tdata_link.read_link(path)
+
+    journal = SwitchJournal()
+    journal.begin(
+        "default", mode="symlink", default=default_folder, current=current,
+        decrypted=configs.decrypted, has_backup=configs.has_backup,
+    )
+    journal.step("backup", decrypted=configs.decrypted, has_backup=configs.has_backup)
+    _seal_tdata(configs, cipher)
+
+    if current != default_folder:
+        temp_link = tdata_link.temp_link_name()
+        journal.step("relink", src=current, dst=default_folder, temp_link=temp_link)
+        try:
+            with SwitchStats().phase("relink"):
+                tdata_link.point_to(path, default_folder, temp_link)
+        except FileNotFoundError:
+            journal.commit()
+            return False
+    journal.commit()
+    return True
+
+
+def link_to_target(configs: ConfigManage, cipher: AESCipher, temp: str):
+    """链接模式: 切换为目标账户, tdata 链接替换为一次原子操作, 无需临时文件夹"""
+    path = configs.path
+    _adopt_tdata(path, temp)
+    target = AccountIndex().find(configs.tag)
+    if not target:
+        return False
+    current = tdata_link.read_link(path)
+    if current == target:
+        return True
 
-        if os.path.exists(target_path):
-            if os.path.isdir(target_path):
-                shutil.rmtree(target_path)
+    journal = SwitchJournal()
+    journal.begin("target", mode="symlink", target=target, previous=current)
+    _open_target(configs, cipher, Path(path) / target, journal)
 
-        # 恢复临时文件夹
-        if os.path.exists(temp_path):
-            os.rename(temp_path, target_path)
-    except OSError:
-        pass  # 回滚失败，状态已损坏
+    temp_link = tdata_link.temp_link_name()
+    journal.step("relink", src=current, dst=target, temp_link=temp_link)
+    with SwitchStats().phase("relink"):
+        tdata_link.point_to(path, target, temp_link)
+    journal.commit(tag=configs.tag, decrypted=configs.decrypted, has_backup=configs.has_backup)
+    return True
 
 
 def recovery():
@@ -175,5 +300,6 @@ def recovery():
     configs = ConfigManage()
     with suppress(FileNotFoundError, PermissionError):
         from src.modules.process_manager import ProcessManager
-        ProcessManager.kill_process(configs.client)
+        from src.modules.account.instances import InstanceManager
+        ProcessManager.kill_process(configs.client, exclude=InstanceManager().pids())
         account_switch("restore")
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# @File ： folder_crypto.py
+# @Time : 2026/10/18 21:10
+# @Author : Zropk
+"""
+整个账户文件夹的加解密 (encrypt_all)
+key_datas 以外的文件按文件并行加解密, 处理结果记录在文件夹内的清单中,
+之后只需处理大小或修改时间发生变化的文件; 清单使用相对路径, 文件夹改名后依然有效
+"""
+import json
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import suppress
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List
+
+from src.modules.aes_crypto import AESCipher
+from src.modules.config_manager import ConfigManage
+from src.modules.exceptions import TASCipherException
+from src.modules.readiness import LOCK_FILES
+from src.modules.stats import SwitchStats
+
+MANIFEST_NAME = ".tas_manifest.json"
+# 由 key_datas 的会话流程单独处理, 为客户端的锁文件 (就绪探针据此判断), 或为加解密过程中的临时文件
+_SKIP_NAMES = {"key_datas", MANIFEST_NAME, *LOCK_FILES}
+_SKIP_SUFFIXES = (".bak", ".enc", ".session", ".tmp")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """所有账户共用的文件级线程池, 并发数即可用的核心数"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=ConfigManage().worker_count, thread_name_prefix="folder_crypto")
+        return _executor
+
+
+def _load_manifest(folder: Path) -> Dict[str, list]:
+    with suppress(OSError, json.JSONDecodeError, TypeError, ValueError):
+        with open(folder / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            loaded = json.load(f)
+        return {str(k): list(v) for k, v in loaded.items() if isinstance(v, list) and len(v) == 3}
+    return {}
+
+
+def _save_manifest(folder: Path, manifest: Dict[str, list]) -> None:
+    temp_file = folder / f"{MANIFEST_NAME}.tmp"
+    with suppress(OSError):
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, folder / MANIFEST_NAME)
+
+
+def _markers() -> set:
+    config = ConfigManage()
+    return {marker for marker in (*config.tags, config.default) if marker}
+
+
+def _walk(folder: Path, markers: set) -> Dict[str, os.stat_result]:
+    """列出需要加解密的文件 (不跟随链接)"""
+    files = {}
+    for root, _, names in os.walk(folder):
+        for name in names:
+            if name.endswith(_SKIP_SUFFIXES) or (root == str(folder) and (name in _SKIP_NAMES or name in markers)):
+                continue
+            path = os.path.join(root, name)
+            with suppress(OSError):
+                st = os.lstat(path)
+                if stat.S_ISREG(st.st_mode):
+                    files[os.path.relpath(path, folder).replace(os.sep, "/")] = st
+    return files
+
+
+def folder_files(folder: str | Path) -> List[Path]:
+    """账户文件夹中由 encrypt_all 加密的文件 (key_datas 以外)"""
+    folder = Path(folder)
+    return [folder / rel for rel in _walk(folder, _markers())]
+
+
+def _process(cipher: AESCipher, path: Path, method: str) -> tuple[bool, list]:
+    changed = cipher.process_file(path, method)
+    st = os.stat(path)
+    return changed, [st.st_size, st.st_mtime_ns, int(method != cipher.METHOD_DECRYPT)]
+
+
+def process_folder(cipher: AESCipher, folder: str | Path, method: str) -> int:
+    """
+    加解密 (或迁移) 账户文件夹中 key_datas 以外的所有文件, 返回实际处理的文件数
+    清单记录的大小与修改时间未变化且已处于目标状态的文件直接跳过, 无需打开; 迁移时需读取每个文件的格式
+    """
+    folder = Path(folder)
+    target = int(method != cipher.METHOD_DECRYPT)
+
+    manifest = _load_manifest(folder)
+    files = _walk(folder, _markers())
+    updated = {}
+    pending: List[str] = []
+    for rel, st in files.items():
+        entry = manifest.get(rel)
+        if method != cipher.METHOD_MIGRATE and entry == [st.st_size, st.st_mtime_ns, target]:
+            updated[rel] = entry
+        else:
+            pending.append(rel)
+
+    changed = 0
+    failed = []
+    with SwitchStats().phase(f"{method}_folder", path=folder, files=len(pending)):
+        executor = _get_executor()
+        futures = {executor.submit(_process, cipher, folder / rel, method): rel for rel in pending}
+        for future in as_completed(futures):
+            rel = futures[future]
+            try:
+                rewritten, updated[rel] = future.result()
+                changed += rewritten
+            except (OSError, TASCipherException):
+                failed.append(rel)
+
+    if updated != manifest:
+        _save_manifest(folder, updated)
+    if failed:
+        operation = {cipher.METHOD_ENCRYPT: "加密", cipher.METHOD_DECRYPT: "解密"}.get(method, "迁移")
+        raise TASCipherException(f"{len(failed)} 个文件{operation}失败: {sorted(failed)[:3]}")
+    return changed
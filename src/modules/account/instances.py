@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+# @File ： instances.py
+# @Time : 2026/10/18 19:05
+# @Author : Zropk
+import asyncio
+import json
+import os
+import shutil
+import time
+from contextlib import suppress
+from pathlib import Path
+from threading import RLock
+from typing import Any, Dict, Iterable, List
+
+import psutil
+
+from src.modules.account import tdata_link
+from src.modules.account.account_index import AccountIndex
+from src.modules.account.key_session import open_key_datas, close_key_datas
+from src.modules.aes_crypto import AESCipher
+from src.modules.config_manager import ConfigManage
+from src.modules.exceptions import TASCipherException
+from src.modules.logger import Logger
+from src.modules.process_manager import ProcessManager, ProcessMonitor, LaunchHandle
+from src.modules.readiness import TdataActivityProbe
+
+
+def _create_time(pid: int) -> float | None:
+    with suppress(psutil.Error):
+        return psutil.Process(pid).create_time()
+    return None
+
+
+def _is_alive(pid: int | None, created: float | None) -> bool:
+    """进程是否仍在运行 (同时核对创建时间, 避免 PID 被复用)"""
+    if not pid:
+        return False
+    with suppress(psutil.Error):
+        process = psutil.Process(pid)
+        return (
+            process.status() != psutil.STATUS_ZOMBIE
+            and (created is None or abs(process.create_time() - created) < 1)
+        )
+    return False
+
+
+class InstanceManager:
+    """
+    多开实例管理
+    每个账户以独立的工作目录 (instances/<tag>/tdata 链接到账户文件夹) 启动一个客户端, 无需切换 tdata
+    实例状态记录在 instances.json 中, 供查询、停止及异常退出后的恢复使用
+    """
+
+    _instance = None
+    _lock = RLock()
+
+    def __new__(cls):
+        with cls._lock:
+            if not cls._instance:
+                cls._instance = super().__new__(cls)
+                cls._instance.__initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """初始化"""
+        if self.__initialized:
+            return
+
+        self._config = ConfigManage()
+        self.logger = Logger()
+        self._state_path = self._config.config_file.with_name("instances.json")
+        self._root = self._config.config_file.with_name("instances")
+        self._handles: Dict[str, LaunchHandle] = {}
+        self.__initialized = True
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        with suppress(OSError, json.JSONDecodeError):
+            with open(self._state_path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                return loaded
+        return {}
+
+    def _save(self, state: Dict[str, Dict[str, Any]]) -> None:
+        temp_file = self._state_path.with_suffix(".tmp")
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self._state_path)
+
+    def _update(self, tag: str, entry: Dict[str, Any] | None) -> None:
+        """更新单个实例的状态, entry 为 None 时删除"""
+        with self._lock:
+            state = self._load()
+            if entry is None:
+                state.pop(tag, None)
+            else:
+                state[tag] = entry
+            self._save(state)
+
+    def workdir(self, tag: str) -> Path:
+        """实例的工作目录"""
+        return self._root / tag
+
+    def pids(self) -> List[int]:
+        """所有运行中实例的 PID, 单开模式终止客户端时需排除"""
+        return [
+            entry["pid"] for entry in self._load().values()
+            if _is_alive(entry.get("pid"), entry.get("created"))
+        ]
+
+    def running(self, tag: str) -> bool:
+        """账户是否正以多开实例运行 (含正在启动的实例), 此时单开模式不能切换到该账户"""
+        entry = self._load().get(tag)
+        if not entry:
+            return False
+        if entry.get("pid") is None:
+            supervisor, supervisor_created = entry.get("supervisor", (None, None))
+            return _is_alive(supervisor, supervisor_created)
+        return _is_alive(entry.get("pid"), entry.get("created"))
+
+    def status(self) -> List[Dict[str, Any]]:
+        """各实例的运行状态"""
+        result = []
+        for tag, entry in sorted(self._load().items()):
+            alive = _is_alive(entry.get("pid"), entry.get("created"))
+            result.append({
+                "tag": tag,
+                "pid": entry.get("pid"),
+                "alive": alive,
+                "uptime": time.time() - entry["created"] if alive and entry.get("created") else 0.0,
+                "workdir": entry.get("workdir"),
+            })
+        return result
+
+    def _release(self, tag: str, entry: Dict[str, Any]) -> None:
+        """实例退出后重新加密账户数据 (或以备份还原), 并移除工作目录中的链接"""
+        key_datas = os.path.join(self._config.path, entry["folder"], "key_datas")
+        if entry.get("has_backup"):
+            with suppress(OSError):
+                shutil.move(f"{key_datas}.bak", key_datas)
+        elif self._config.pwd:
+            with suppress(FileNotFoundError, TASCipherException):
+                close_key_datas(AESCipher(self._config.pwd), key_datas)
+        elif not AESCipher.is_encrypted(key_datas):
+            self.logger.warning(f"实例 '{tag}' 已退出, 未指定密钥, 账户数据将保持解密状态.")
+        with suppress(OSError):
+            tdata_link.remove_link(os.path.join(entry["workdir"], "tdata"))
+        self._update(tag, None)
+
+    def recover(self) -> None:
+        """清理已退出且无人监管的实例 (上次运行异常退出时遗留)"""
+        for tag, entry in self._load().items():
+            if _is_alive(entry.get("pid"), entry.get("created")):
+                continue
+            supervisor, supervisor_created = entry.get("supervisor", (None, None))
+            if supervisor == os.getpid() or not _is_alive(supervisor, supervisor_created):
+                self.logger.warning(f"实例 '{tag}' 已退出, 正在还原账户数据...")
+                self._release(tag, entry)
+
+    def launch(self, tag: str) -> LaunchHandle | None:
+        """以独立工作目录启动账户实例, 等待就绪后返回启动句柄"""
+        if self.running(tag):
+            self.logger.warning(f"实例 '{tag}' 已在运行, PID: {self._load()[tag]['pid'] or '启动中'}.")
+            return None
+
+        folder = AccountIndex().find(tag)
+        if not folder:
+            self.logger.error(f"标签 '{tag}' 的账户文件夹未找到.")
+            return None
+        if folder == "tdata" or folder == tdata_link.read_link(self._config.path):
+            self.logger.error(f"账户 '{tag}' 正在以单开模式使用, 无法多开.")
+            return None
+
+        workdir = self.workdir(tag)
+        workdir.mkdir(parents=True, exist_ok=True)
+        tdata_link.replace_link("", os.path.join(self._config.path, folder), str(workdir / "tdata"))
+
+        # 先写入状态再解密, 异常退出后可据此重新加密
+        entry = {
+            "folder": folder,
+            "workdir": str(workdir),
+            "pid": None,
+            "created": None,
+            "supervisor": (os.getpid(), _create_time(os.getpid())),
+            "has_backup": False,
+        }
+        self._update(tag, entry)
+
+        key_datas = os.path.join(self._config.path, folder, "key_datas")
+        try:
+            open_key_datas(AESCipher(self._config.pwd), key_datas)
+        except TASCipherException:
+            shutil.copy2(key_datas, f"{key_datas}.bak")
+            entry["has_backup"] = True
+            self._update(tag, entry)
+
+        handle = ProcessManager.start_process(
+            self._config,
+            probe=TdataActivityProbe(workdir / "tdata"),
+            extra_args=["-workdir", str(workdir)],
+        )
+        if handle is None:
+            self._release(tag, entry)
+            return None
+
+        entry.update(pid=handle.pid, created=_create_time(handle.pid))
+        self._update(tag, entry)
+        self._handles[tag] = handle
+        self.logger.info(f"实例 '{tag}' 已启动, PID: {handle.pid}.")
+        return handle
+
+    def stop(self, tag: str) -> bool:
+        """停止实例; 监管进程已退出时直接还原账户数据"""
+        entry = self._load().get(tag)
+        if entry is None:
+            return False
+
+        if _is_alive(entry.get("pid"), entry.get("created")):
+            with suppress(psutil.Error):
+                process = psutil.Process(entry["pid"])
+                process.terminate()
+                _, alive = psutil.wait_procs([process], timeout=3)
+                for process in alive:
+                    process.kill()
+
+        # 由本进程监管的实例, 退出后由 supervise 负责还原
+        if tag in self._handles:
+            return True
+        supervisor, supervisor_created = entry.get("supervisor", (None, None))
+        if not _is_alive(supervisor, supervisor_created):
+            self._release(tag, entry)
+        return True
+
+    async def supervise(self, tags: Iterable[str], stop: asyncio.Event | None = None) -> None:
+        """启动并监管多个实例, 每个实例一个 ProcessMonitor; 全部退出或收到停止信号时返回"""
+        loop = asyncio.get_running_loop()
+        tags = list(tags)
+        await loop.run_in_executor(None, self.recover)
+
+        handles = await asyncio.gather(*(loop.run_in_executor(None, self.launch, tag) for tag in tags))
+        running = {tag: handle for tag, handle in zip(tags, handles) if handle is not None}
+        monitors = {}
+        for tag, handle in running.items():
+            monitors[tag] = ProcessMonitor(self._config.client)
+            monitors[tag].attach(handle)
+            await monitors[tag].start_watching()
+
+        async def watch(tag: str, handle: LaunchHandle) -> None:
+            returncode = await asyncio.wrap_future(handle.exit_future)
+            self.logger.info(f"实例 '{tag}' 已退出, 退出码: {returncode}.")
+            entry = self._load().get(tag)
+            if entry is not None:
+                await loop.run_in_executor(None, self._release, tag, entry)
+            self._handles.pop(tag, None)
+
+        watchers = [asyncio.create_task(watch(tag, handle)) for tag, handle in running.items()]
+        stop_task = asyncio.create_task(stop.wait()) if stop is not None else None
+        try:
+            pending = set(watchers)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending | ({stop_task} if stop_task else set()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if stop_task in done:
+                    self.logger.warning("收到中断信号, 正在停止所有实例...")
+                    for tag in list(running):
+                        await loop.run_in_executor(None, self.stop, tag)
+                    await asyncio.gather(*watchers, return_exceptions=True)
+                    break
+                pending.discard(stop_task)
+        finally:
+            if stop_task is not None:
+                stop_task.cancel()
+            for monitor in monitors.values():
+                await monitor.stop_watching()
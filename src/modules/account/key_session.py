@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# @File ： key_session.py
+# @Time : 2026/10/18 19:40
+# @Author : Zropk
+"""
+会话期间 key_datas 的解密与还原
+临时明文模式 (ephemeral) 下加密文件保留为 key_datas.enc, 会话使用解密出的明文副本;
+还原时明文未被修改则直接丢弃, 只有被客户端修改过才重新加密
+启用 encrypt_all 时, 账户文件夹中的其余文件随 key_datas 一同解密与重新加密
+"""
+import hashlib
+import json
+import os
+from contextlib import suppress
+from pathlib import Path
+
+from src.modules.account.folder_crypto import process_folder
+from src.modules.aes_crypto import AESCipher
+from src.modules.config_manager import ConfigManage
+from src.modules.exceptions import TASCipherException
+from src.modules.logger import Logger
+from src.modules.stats import SwitchStats
+
+ENCRYPTED_SUFFIX = ".enc"
+SESSION_SUFFIX = ".session"
+
+
+def _sidecar(key_datas: Path) -> Path:
+    return key_datas.with_name(key_datas.name + SESSION_SUFFIX)
+
+
+def _encrypted(key_datas: Path) -> Path:
+    return key_datas.with_name(key_datas.name + ENCRYPTED_SUFFIX)
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(AESCipher.CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _open_folder(cipher: AESCipher, key_datas: Path) -> None:
+    """密钥已被证实正确时解密文件夹中的其余文件"""
+    config = ConfigManage()
+    if not config.encrypt_all or not (cipher.verified or config.key_check):
+        return
+    try:
+        process_folder(cipher, key_datas.parent, cipher.METHOD_DECRYPT)
+    except TASCipherException as e:
+        # 失败的文件仍保持加密, 还原时会被跳过
+        Logger().warning(f"账户文件夹解密不完整, {e.message}")
+
+
+def open_key_datas(cipher: AESCipher, key_datas: str | Path) -> None:
+    """为会话解密 key_datas; 解密失败时抛出 TASCipherException 且文件保持原状"""
+    key_datas = Path(key_datas)
+    if not ConfigManage().ephemeral:
+        cipher.decrypt(key_datas)
+        _open_folder(cipher, key_datas)
+        return
+
+    if not AESCipher.is_encrypted(key_datas):
+        _open_folder(cipher, key_datas)
+        return
+
+    encrypted = _encrypted(key_datas)
+    os.replace(key_datas, encrypted)
+    try:
+        sha256 = cipher.decrypt_to(encrypted, key_datas)
+    except BaseException:
+        os.replace(encrypted, key_datas)
+        raise
+
+    stat = os.stat(key_datas)
+    with open(_sidecar(key_datas), "w", encoding="utf-8") as f:
+        json.dump({"sha256": sha256, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    _open_folder(cipher, key_datas)
+
+
+def _unchanged(key_datas: Path) -> bool:
+    """明文是否未被修改: 大小与修改时间一致时直接判定, 否则比较内容摘要"""
+    with suppress(OSError, json.JSONDecodeError, KeyError):
+        with open(_sidecar(key_datas), "r", encoding="utf-8") as f:
+            session = json.load(f)
+        stat = os.stat(key_datas)
+        if stat.st_size == session["size"] and stat.st_mtime_ns == session["mtime_ns"]:
+            return True
+        return stat.st_size == session["size"] and _file_digest(key_datas) == session["sha256"]
+    return False
+
+
+def close_key_datas(cipher: AESCipher | None, key_datas: str | Path) -> None:
+    """
+    会话结束时还原 key_datas 的加密状态; 可重复调用, 用于异常中断后的恢复
+    cipher 为 None (未指定密钥) 时只执行无需密钥的还原
+    """
+    key_datas = Path(key_datas)
+    try:
+        _close_key_datas(cipher, key_datas)
+    finally:
+        if cipher is not None and ConfigManage().encrypt_all and key_datas.parent.is_dir():
+            process_folder(cipher, key_datas.parent, cipher.METHOD_ENCRYPT)
+
+
+def _close_key_datas(cipher: AESCipher | None, key_datas: Path) -> None:
+    encrypted = _encrypted(key_datas)
+    sidecar = _sidecar(key_datas)
+
+    if not encrypted.exists():
+        with suppress(FileNotFoundError):
+            os.unlink(sidecar)
+        if cipher is not None:
+            cipher.encrypt(key_datas)
+        return
+
+    if not sidecar.exists() or not key_datas.exists() or _unchanged(key_datas):
+        # 明文未被修改 (或解密未完成), 直接换回原加密文件
+        with SwitchStats().phase("discard"):
+            os.replace(encrypted, key_datas)
+    elif cipher is not None:
+        cipher.encrypt(key_datas)
+        os.unlink(encrypted)
+    else:
+        raise TASCipherException("明文已被修改, 未指定密钥, 无法重新加密.")
+    with suppress(FileNotFoundError):
+        os.unlink(sidecar)
+
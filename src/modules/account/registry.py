@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# @File ： registry.py
+# @Time : 2026/10/18 16:45
+# @Author : Zropk
+import hashlib
+import os
+import sqlite3
+import time
+from threading import RLock
+from typing import Any, Dict, Iterable, List
+
+from src.modules.config_manager import ConfigManage
+
+
+class AccountRegistry:
+    """
+    基于 sqlite3 的账户注册表, 以标签为主键索引, 适用于大量账户
+    启用后作为标签、账户文件夹及加密状态的查询来源, 每次查询只读取一行, 与账户数量无关;
+    标签仍以 configs.json 为准 (由用户编辑), 列表变化时同步导入
+    """
+
+    _instance = None
+    _lock = RLock()
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS accounts (
+            tag       TEXT PRIMARY KEY,
+            last_used REAL,
+            use_count INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS folders (
+            tag    TEXT PRIMARY KEY,
+            folder TEXT NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS folders_folder ON folders (folder);
+        CREATE TABLE IF NOT EXISTS file_state (
+            path      TEXT PRIMARY KEY,
+            ino       INTEGER NOT NULL,
+            size      INTEGER NOT NULL,
+            mtime_ns  INTEGER NOT NULL,
+            encrypted INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __new__(cls):
+        with cls._lock:
+            if not cls._instance:
+                cls._instance = super().__new__(cls)
+                cls._instance.__initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """初始化"""
+        if self.__initialized:
+            return
+
+        self._config = ConfigManage()
+        self._db_path = self._config.config_file.with_name("accounts.db")
+        self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self._SCHEMA)
+
+        self.__initialized = True
+        self.sync()
+
+    def _config_stamp(self) -> str:
+        """配置文件标识, 未变化时无需读取标签列表"""
+        try:
+            stat = os.stat(self._config.config_file)
+            return f"{stat.st_mtime_ns}:{stat.st_size}"
+        except OSError:
+            return ""
+
+    def _meta(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def sync(self) -> None:
+        """
+        标签列表变化后, 将 configs.json 中的标签批量导入注册表
+        配置文件未变化时直接跳过; 变化时以标签列表的摘要判断, 修改其他配置项不会触发导入
+        """
+        stamp = self._config_stamp()
+        with self._lock:
+            if stamp and self._meta("config_stamp") == stamp:
+                return
+            tags = [tag for tag in self._config.tags if tag]
+            digest = hashlib.sha1("\0".join(tags).encode("utf-8")).hexdigest()
+            if self._meta("tags_digest") != digest:
+                self.import_tags(tags, prune=True)
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    (("config_stamp", stamp), ("tags_digest", digest)),
+                )
+
+    def import_tags(self, tags: Iterable[str], prune: bool = False) -> None:
+        """批量导入标签; prune 为 True 时删除不在列表中的标签"""
+        tags = list(dict.fromkeys(tag for tag in tags if tag))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO accounts (tag) VALUES (?)", ((tag,) for tag in tags)
+            )
+            if prune:
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep (tag TEXT PRIMARY KEY)")
+                self._conn.execute("DELETE FROM keep")
+                self._conn.executemany("INSERT OR IGNORE INTO keep (tag) VALUES (?)", ((tag,) for tag in tags))
+                self._conn.execute("DELETE FROM accounts WHERE tag NOT IN (SELECT tag FROM keep)")
+
+    def contains(self, tag: str) -> bool:
+        """标签是否已注册"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM accounts WHERE tag = ?", (tag,)
+            ).fetchone() is not None
+
+    def get(self, tag: str) -> Dict[str, Any] | None:
+        """获取账户的使用记录 (last_used / use_count)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tag, last_used, use_count FROM accounts WHERE tag = ?", (tag,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def folder(self, tag: str) -> str | None:
+        """上次记录的标签所在账户文件夹 (含默认账户, 调用方需自行核对)"""
+        with self._lock:
+            row = self._conn.execute("SELECT folder FROM folders WHERE tag = ?", (tag,)).fetchone()
+        return row["folder"] if row else None
+
+    def set_folders(self, folders: Dict[str, str]) -> None:
+        """批量记录标签所在的账户文件夹"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO folders (tag, folder) VALUES (?, ?)", folders.items()
+            )
+
+    def rename_folder(self, src: str, dst: str) -> None:
+        """账户文件夹改名后同步更新"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE folders SET folder = ? WHERE folder = ?", (dst, src))
+
+    def file_state(self, path: str) -> List[int] | None:
+        """文件的加密状态记录: [inode, 大小, 修改时间, 是否加密]"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ino, size, mtime_ns, encrypted FROM file_state WHERE path = ?", (path,)
+            ).fetchone()
+        return list(row) if row else None
+
+    def put_file_states(self, entries: Dict[str, List[int]]) -> None:
+        """批量写入文件的加密状态记录"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO file_state (path, ino, size, mtime_ns, encrypted) VALUES (?, ?, ?, ?, ?)",
+                ((path, *entry) for path, entry in entries.items()),
+            )
+
+    def touch(self, tag: str) -> None:
+        """记录一次账户使用"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE accounts SET last_used = ?, use_count = use_count + 1 WHERE tag = ?",
+                (time.time(), tag),
+            )
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# @File ： rotation.py
+# @Time : 2026/10/18 22:15
+# @Author : Zropk
+import json
+import os
+from contextlib import suppress
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Set
+
+from src.modules.account.account_index import AccountIndex
+from src.modules.account.folder_crypto import folder_files
+from src.modules.aes_crypto import AESCipher
+from src.modules.config_manager import ConfigManage
+from src.modules.exceptions import TASCipherException
+
+
+def _journal_path() -> Path:
+    return ConfigManage().config_file.with_name("rotation.journal")
+
+
+class KeyRotation:
+    """
+    批量更换密钥
+    每个文件以旧密钥流式解密后直接以新密钥写回 (单次读写); 完成的文件记录到检查点日志,
+    中断后以相同的新旧密钥重新执行时从中断处继续, 已完成的文件不再处理
+    """
+
+    def __init__(self, old: AESCipher, new: AESCipher):
+        self._config = ConfigManage()
+        self._journal_path = _journal_path()
+        self._old, self._new = old, new
+        self._done: Set[str] = set()
+        self._write_lock = Lock()
+
+    @staticmethod
+    def pending() -> bool:
+        """是否存在未完成的密钥轮换"""
+        return _journal_path().exists()
+
+    def _write(self, record: Dict[str, Any], mode: str = "a") -> None:
+        with self._write_lock, open(self._journal_path, mode, encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            # 检查点丢失时 _rotate_file 可识别已更换密钥的文件, 无需每条记录都 fsync
+            if mode == "w":
+                os.fsync(f.fileno())
+
+    def _records(self) -> List[Dict[str, Any]]:
+        """读取日志记录, 忽略未完整写入的末行"""
+        records = []
+        with suppress(FileNotFoundError):
+            with open(self._journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+        return records
+
+    def prepare(self) -> int:
+        """校验密钥并开始 (或恢复) 轮换, 返回此前已完成的文件数"""
+        records = self._records()
+        if records:
+            head = records[0]
+            if not (self._old.matches(head["old_check"]) and self._new.matches(head["new_check"])):
+                raise TASCipherException("与未完成的密钥轮换使用的密钥不一致")
+            self._done = {record["file"] for record in records[1:] if record.get("step") == "done"}
+            return len(self._done)
+
+        # 旧格式无法可靠地识别错误的密钥, 开始前必须确认旧密钥正确
+        if not self._config.key_check:
+            raise TASCipherException("尚未记录密钥校验值, 请先使用该密钥成功解密一次")
+        if not self._old.matches(self._config.key_check):
+            raise TASCipherException("密钥错误")
+        self._write({"step": "begin", "old_check": self._old.key_check(), "new_check": self._new.key_check()}, "w")
+        return 0
+
+    def _files(self, folder: str) -> List[Path]:
+        base = Path(self._config.path) / folder
+        files = [base / "key_datas"]
+        if self._config.encrypt_all:
+            files += folder_files(base)
+        return files
+
+    def _rotate_file(self, path: Path, track: bool) -> bool:
+        """更换单个文件的密钥, 返回文件是否被改写"""
+        name = os.path.relpath(path, self._config.path).replace(os.sep, "/")
+        if name in self._done:
+            return False
+        try:
+            changed = self._old.rekey(path, self._new, track=track)
+        except TASCipherException:
+            # 文件已替换但检查点未写入时, 文件已是新密钥
+            try:
+                self._new.verify(path, sample=1)
+            except TASCipherException:
+                raise TASCipherException(f"{name} 无法以旧密钥解密") from None
+            changed = False
+        self._write({"step": "done", "file": name})
+        return changed
+
+    def rotate_tag(self, tag: str) -> tuple[int, str | None]:
+        """
+        更换单个标签账户的密钥
+        返回: (改写的文件数, 错误信息)
+        """
+        folder = AccountIndex().find(tag)
+        if not folder:
+            return 0, f"标签 '{tag}' 文件缺失"
+
+        changed = 0
+        for index, path in enumerate(self._files(folder)):
+            if not path.exists():
+                continue
+            try:
+                changed += self._rotate_file(path, track=index == 0)
+            except (OSError, TASCipherException) as e:
+                return changed, str(e)
+        return changed, None
+
+    def remaining(self, tags: List[str]) -> List[str]:
+        """仍无法以新密钥解密的加密文件 (未轮换或轮换失败)"""
+        files = []
+        for tag in tags:
+            folder = AccountIndex().find(tag)
+            if not folder:
+                continue
+            for path in self._files(folder):
+                if self._new.encryption_state(path) is not True:
+                    continue
+                try:
+                    self._new.verify(path, sample=1)
+                except TASCipherException:
+                    files.append(os.path.relpath(path, self._config.path).replace(os.sep, "/"))
+        return files
+
+    def finish(self, tags: List[str]) -> None:
+        """
+        确认所有账户均已完成后记录新密钥的校验值并删除检查点日志
+        仍有旧密钥加密的文件时抛出 TASCipherException 并保留日志, 以免新密钥生效后这些账户无法解密
+        """
+        remaining = self.remaining(tags)
+        if remaining:
+            raise TASCipherException(f"{len(remaining)} 个文件仍以旧密钥加密: {remaining[:3]}")
+        self._config.key_check = self._new.key_check()
+        self._config.flush()
+        with suppress(FileNotFoundError):
+            os.unlink(self._journal_path)
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+# @File ： switch_journal.py
+# @Time : 2026/10/18 11:03
+# @Author : Zropk
+import json
+import os
+import shutil
+from contextlib import suppress
+from typing import Any, Dict, List
+
+from src.modules.account import tdata_link
+from src.modules.account.account_index import AccountIndex
+from src.modules.account.key_session import close_key_datas
+from src.modules.aes_crypto import AESCipher
+from src.modules.config_manager import ConfigManage
+from src.modules.exceptions import TASCipherException
+from src.modules.logger import Logger
+
+
+class SwitchJournal:
+    """
+    账户切换预写日志
+    每一步操作执行前先写入并 fsync, 启动时据此精确回滚或补全被中断的步骤
+    """
+
+    def __init__(self):
+        self._config = ConfigManage()
+        self._journal_path = self._config.config_file.with_name("switch.journal")
+
+    def _write(self, record: Dict[str, Any], mode: str = "a") -> None:
+        with open(self._journal_path, mode, encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def begin(self, method: str, **info: Any) -> None:
+        """开始一次切换"""
+        self._write({"step": "begin", "method": method, **info}, mode="w")
+
+    def step(self, name: str, **info: Any) -> None:
+        """记录即将执行的步骤"""
+        self._write({"step": name, **info})
+
+    def commit(self, **session: Any) -> None:
+        """
+        切换完成
+        传入 session 时保留会话状态 (解密/备份), 供异常退出后还原使用
+        """
+        if session:
+            self._write({"step": "session", **session}, mode="w")
+        else:
+            with suppress(FileNotFoundError):
+                os.unlink(self._journal_path)
+
+    def records(self) -> List[Dict[str, Any]]:
+        """读取日志记录, 忽略未完整写入的末行"""
+        records = []
+        with suppress(FileNotFoundError):
+            with open(self._journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+        return records
+
+    def recover(self, cipher: AESCipher | None) -> bool:
+        """
+        根据日志恢复被中断的切换; cipher 为 None 表示未指定密钥
+        返回上次会话是否未还原 (需要切换回默认账户)
+        """
+        records = self.records()
+        if not records:
+            return False
+
+        head = records[0]
+        steps = {record["step"]: record for record in records[1:]}
+        if head["step"] == "session" or (head["method"] == "default" and "backup" not in steps):
+            # 上次会话未正常还原 (或还原尚未执行任何操作), 恢复运行时状态以便还原时重新加密
+            self._restore_session(head, cipher is not None)
+            return True
+
+        Logger().warning(f"检测到中断的切换 ({head['method']}), 正在恢复...")
+        path = self._config.path
+        if head["method"] == "adopt":
+            # tdata 已改名但链接尚未创建
+            if not os.path.lexists(os.path.join(path, "tdata")):
+                tdata_link.point_to(path, head["folder"])
+        elif head["method"] == "materialize":
+            # 链接已删除但账户文件夹尚未改名为 tdata
+            if tdata_link.read_link(path) is not None:
+                tdata_link.materialize(path)
+            elif not os.path.lexists(os.path.join(path, "tdata")) and os.path.isdir(os.path.join(path, head["folder"])):
+                os.rename(os.path.join(path, head["folder"]), os.path.join(path, "tdata"))
+            AccountIndex().invalidate()
+        elif head["method"] == "target":
+            self._rollback_target(head, steps, cipher)
+        else:
+            self._complete_default(head, steps, cipher)
+            if head.get("mode") != "symlink" and AccountIndex().find(self._config.default) != "tdata":
+                # 中断于改名之前, key_datas 已重新加密, 仍需切换回默认账户
+                self._discard_temp_links(records)
+                self.commit()
+                return True
+        self._discard_temp_links(records)
+        self.commit()
+        return False
+
+    def rollback(self, cipher: AESCipher | None) -> None:
+        """撤销进行中的切换到目标账户 (切换失败时调用) 并提交日志"""
+        records = self.records()
+        if records and records[0]["step"] != "session" and records[0]["method"] == "target":
+            self._rollback_target(records[0], {record["step"]: record for record in records[1:]}, cipher)
+            self._discard_temp_links(records)
+        self.commit()
+
+    def _discard_temp_links(self, records: List[Dict[str, Any]]) -> None:
+        """删除日志中记录的临时链接 (替换 tdata 链接时中断遗留)"""
+        for record in records:
+            tdata_link.discard(self._config.path, record.get("temp_link"))
+
+    def _restore_session(self, record: Dict[str, Any], has_key: bool) -> None:
+        """恢复会话的运行时状态 (解密/备份)"""
+        self._config.decrypted = record.get("decrypted", False) and has_key
+        self._config.has_backup = record.get("has_backup", False)
+        if record.get("decrypted") and not has_key:
+            Logger().warning("上次会话未正常结束, 未指定密钥, 账户数据将保持解密状态.")
+
+    def _rollback_target(self, head: Dict[str, Any], steps: Dict[str, Dict], cipher: AESCipher | None) -> None:
+        """按相反顺序回滚切换到目标账户的各个步骤"""
+        index = AccountIndex()
+        path = self._config.path
+
+        record = steps.get("relink")
+        if record and record["src"] and tdata_link.read_link(path) != record["src"]:
+            tdata_link.point_to(path, record["src"])
+
+        for name in ("rename_in", "rename_out"):
+            record = steps.get(name)
+            if not record:
+                continue
+            src, dst = record["src"], record["dst"]
+            if os.path.exists(os.path.join(path, dst)) and not os.path.exists(os.path.join(path, src)):
+                index.rename(dst, src)
+
+        record = steps.get("decrypt")
+        if not record:
+            return
+        key_datas = os.path.join(path, head["target"], "key_datas")
+        if record.get("backup"):
+            with suppress(OSError):
+                shutil.move(f"{key_datas}.bak", key_datas)
+        else:
+            with suppress(FileNotFoundError, TASCipherException):
+                close_key_datas(cipher, key_datas)
+
+    def _complete_default(self, head: Dict[str, Any], steps: Dict[str, Dict], cipher: AESCipher | None) -> None:
+        """补全切换回默认账户时未完成的步骤"""
+        index = AccountIndex()
+        path = self._config.path
+        current = "tdata"
+
+        if head.get("mode") == "symlink":
+            # 链接模式下账户文件夹不会被改名, 直接重新指向默认账户
+            current = head.get("current") or current
+            if head.get("default") and tdata_link.read_link(path) != head["default"]:
+                tdata_link.point_to(path, head["default"])
+
+        record = steps.get("rename_out")
+        if record and os.path.exists(os.path.join(path, record["dst"])):
+            current = record["dst"]
+            if not os.path.exists(os.path.join(path, "tdata")):
+                if os.path.exists(os.path.join(path, head["default"])):
+                    index.rename(head["default"], "tdata")
+                else:
+                    index.rename(current, "tdata")
+                    current = "tdata"
+
+        record = steps.get("backup")
+        if not record:
+            return
+        key_datas = os.path.join(path, current, "key_datas")
+        if record.get("has_backup") and not record.get("decrypted"):
+            with suppress(OSError):
+                shutil.move(f"{key_datas}.bak", key_datas)
+        elif record.get("decrypted"):
+            with suppress(FileNotFoundError, TASCipherException):
+                close_key_datas(cipher, key_datas)
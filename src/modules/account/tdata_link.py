@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# @File ： tdata_link.py
+# @Time : 2026/10/18 18:20
+# @Author : Zropk
+"""
+链接切换模式下的 tdata 链接操作
+tdata 为指向账户文件夹的符号链接 (Windows 下为目录联接), 切换账户只需替换链接
+"""
+import os
+import random
+import sys
+from contextlib import suppress
+
+LINK_NAME = "tdata"
+_TEMP_PREFIX = "tdata.link-"
+
+
+def is_link(path: str) -> bool:
+    """路径是否为符号链接或目录联接"""
+    return os.path.islink(path) or (sys.platform == "win32" and os.path.isjunction(path))
+
+
+def read_link(base: str) -> str | None:
+    """返回 tdata 当前指向的账户文件夹名称; tdata 不是链接时返回 None"""
+    link = os.path.join(base, LINK_NAME)
+    if not is_link(link):
+        return None
+    return os.path.basename(os.path.normpath(os.readlink(link)))
+
+
+def remove_link(path: str) -> None:
+    """删除链接本身, 不影响其指向的文件夹"""
+    if sys.platform == "win32":
+        os.rmdir(path)
+    else:
+        os.unlink(path)
+
+
+def _create_link(base: str, folder: str, link: str) -> None:
+    if sys.platform == "win32":
+        # 目录联接无需管理员权限或开发者模式
+        import _winapi
+        _winapi.CreateJunction(os.path.join(base, folder), link)
+    else:
+        os.symlink(folder, link, target_is_directory=True)
+
+
+def temp_link_name() -> str:
+    """生成临时链接名称; 调用方先将其写入切换日志, 中断后恢复时只需清理该路径"""
+    return f"{_TEMP_PREFIX}{''.join(random.sample('ABCDEFGH', 8))}"
+
+
+def point_to(base: str, folder: str, temp: str | None = None) -> None:
+    """将 tdata 指向指定账户文件夹"""
+    replace_link(base, folder, os.path.join(base, LINK_NAME), temp)
+
+
+def replace_link(base: str, folder: str, link: str, temp: str | None = None) -> None:
+    """
+    创建或替换指向 base 下账户文件夹的链接 (folder 为绝对路径时 base 可为空)
+    先创建临时链接 (名称为 temp) 再重命名覆盖, POSIX 下替换为原子操作;
+    Windows 下无法覆盖目录联接, 先删除旧联接再重命名, 其间中断时由切换日志中的 relink 记录重新指向
+    """
+    if not os.path.isdir(os.path.join(base, folder)) or is_link(os.path.join(base, folder)):
+        raise FileNotFoundError(f"账户文件夹不存在: {folder}")
+
+    temp = os.path.join(os.path.dirname(link), temp or temp_link_name())
+    _create_link(base, folder, temp)
+    try:
+        if sys.platform == "win32" and is_link(link):
+            remove_link(link)
+        os.replace(temp, link)
+    except OSError:
+        with suppress(OSError):
+            remove_link(temp)
+        raise
+
+
+def adopt(base: str, folder: str, temp: str | None = None) -> None:
+    """将真实的 tdata 文件夹改名为 folder, 并以链接替代 (首次启用链接模式时调用)"""
+    link = os.path.join(base, LINK_NAME)
+    if is_link(link) or not os.path.isdir(link):
+        return
+    os.rename(link, os.path.join(base, folder))
+    point_to(base, folder, temp)
+
+
+def materialize(base: str) -> None:
+    """将 tdata 链接还原为真实文件夹 (切回重命名模式时调用)"""
+    folder = read_link(base)
+    if folder is None:
+        return
+    link = os.path.join(base, LINK_NAME)
+    remove_link(link)
+    os.rename(os.path.join(base, folder), link)
+
+
+def discard(base: str, temp: str | None) -> None:
+    """删除中断遗留的临时链接 (名称取自切换日志, 无需扫描目录)"""
+    if not temp or not temp.startswith(_TEMP_PREFIX):
+        return
+    path = os.path.join(base, temp)
+    if is_link(path):
+        with suppress(OSError):
+            remove_link(path)
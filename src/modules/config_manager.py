@@ -3,16 +3,18 @@
 # @Author : Zropk
 from datetime import datetime
 from typing import Dict, Any
-from threading import RLock, Thread
+from threading import RLock, Timer
 from contextlib import suppress
 from copy import deepcopy
 from pathlib import Path
+import asyncio
+import atexit
 import json
-import time
 import os
 import weakref
 
 from src.modules.utils import format_timedelta
+from src.modules.tracer import Tracer
 
 
 class ConfigField:
@@ -61,7 +63,7 @@ class ConfigField:
         instance._config[self.name] = value
         instance._config_changed = True
         if not getattr(instance, "_batch", False):
-            instance._save_config(instance._config)
+            instance._schedule_save()
 
     def clear_cache(self, instance: Any) -> None:
         """清除特定实例的缓存"""
@@ -77,15 +79,33 @@ class ConfigManage:
     default = ConfigField("default", str, "")
     tags = ConfigField("tags", list, [])
     log_output = ConfigField("log_output", bool, True)
+    workers = ConfigField("workers", int, 0)
+    ready_timeout = ConfigField("ready_timeout", float, 15.0)
+    registry = ConfigField("registry", bool, False)
+    switch_mode = ConfigField("switch_mode", str, "rename")
+    ephemeral = ConfigField("ephemeral", bool, False)
+    key_check = ConfigField("key_check", str, "")
+    encrypt_all = ConfigField("encrypt_all", bool, False)
+    kdf_salt = ConfigField("kdf_salt", str, "")
 
     _instance = None
     _lock = RLock()
+    # 写入防抖窗口 (秒), 窗口内的多次修改合并为一次落盘
+    SAVE_DELAY = 0.5
     _DEFAULT_CONFIG = {
         "client": "Telegram.exe",
         "path": "",
         "default": "",
         "tags": [],
         "log_output": True,
+        "workers": 0,
+        "ready_timeout": 15.0,
+        "registry": False,
+        "switch_mode": "rename",
+        "ephemeral": False,
+        "key_check": "",
+        "encrypt_all": False,
+        "kdf_salt": "",
     }
 
     def __new__(cls):
@@ -107,8 +127,9 @@ class ConfigManage:
 
         self._batch = False
         self._config_changed = False
-        self._save_thread = None
-        self._save_thread_running = True
+        self._save_timer: Timer | asyncio.TimerHandle | None = None
+        self._save_loop: asyncio.AbstractEventLoop | None = None
+        self._tag_set: tuple[list, frozenset] | None = None
 
         # 运行时状态
         self._process_status: bool = False
@@ -120,17 +141,12 @@ class ConfigManage:
         self._start_time: datetime = datetime.now()
 
         self.__initialized = True
-        self._start_auto_save()
+        atexit.register(self.flush)
 
     def __del__(self):
-        """停止自动保存线程"""
-        self._save_thread_running = False
-        if self._save_thread and self._save_thread.is_alive():
-            with suppress(RuntimeError):
-                self._save_thread.join(timeout=1.0)
-
-        if self._config_changed:
-            self._save_config(self._config)
+        """保存未写入的修改"""
+        with suppress(AttributeError):
+            self.flush()
 
     def __enter__(self):
         """进入批量更新模式"""
@@ -146,21 +162,45 @@ class ConfigManage:
             self._config_changed = True
         else:
             if self._config_changed:
-                self._save_config(self._config)
-
-    def _start_auto_save(self) -> None:
-        """启动自动保存线程"""
-        self._save_thread = Thread(target=self._auto_save_worker, daemon=True)
-        self._save_thread.start()
-
-    def _auto_save_worker(self) -> None:
-        """自动保存工作线程"""
-        while self._save_thread_running:
+                self._schedule_save()
+
+    def _schedule_save(self) -> None:
+        """
+        延迟写入: 防抖窗口结束时统一保存一次
+        在事件循环中修改时由该循环定时保存, 否则使用后台定时器线程
+        """
+        with self._lock:
+            if self._save_loop is not None and self._save_loop.is_closed():
+                # 事件循环已结束, 其中尚未执行的定时保存不会再触发
+                self._save_timer = self._save_loop = None
+            if self._save_timer is not None:
+                return
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._save_timer = Timer(self.SAVE_DELAY, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+            else:
+                self._save_timer = loop.call_later(self.SAVE_DELAY, self.flush)
+                self._save_loop = loop
+
+    def flush(self) -> None:
+        """立即保存尚未写入的修改"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = self._save_loop = None
             if self._config_changed and not self._batch:
+                self._config_changed = False
                 self._save_config(self._config)
-            if self._complete:
-                break
-            time.sleep(5)
+
+    def reload(self) -> None:
+        """从磁盘重新加载配置文件 (先保存尚未写入的修改, 以免丢失)"""
+        with self._lock:
+            self.flush()
+            self._config = self._load_config()
+            self.clear_cache()
 
     def batch_update(self, updates: Dict[str, Any]) -> None:
         """批量更新配置项"""
@@ -171,17 +211,18 @@ class ConfigManage:
 
     def _load_config(self) -> Dict[str, Any]:
         """加载配置文件"""
-        try:
-            if not self._config_path.exists():
-                self._save_config(self._DEFAULT_CONFIG)
+        with Tracer().span("config_load"):
+            try:
+                if not self._config_path.exists():
+                    self._save_config(self._DEFAULT_CONFIG)
 
-            with open(self._config_path, "r", encoding="utf-8") as f:
-                loaded = json.load(f)
-                if not isinstance(loaded, dict):
-                    loaded = {}
-                return {**self._DEFAULT_CONFIG, **loaded}
-        except (json.JSONDecodeError, IOError):
-            return self._DEFAULT_CONFIG.copy()
+                with open(self._config_path, "r", encoding="utf-8") as f:
+                    loaded = json.load(f)
+                    if not isinstance(loaded, dict):
+                        loaded = {}
+                    return {**self._DEFAULT_CONFIG, **loaded}
+            except (json.JSONDecodeError, IOError):
+                return self._DEFAULT_CONFIG.copy()
 
     def _save_config(self, configs: Dict[str, Any]) -> None:
         """保存配置文件"""
@@ -200,7 +241,6 @@ class ConfigManage:
                 os.fsync(f.fileno())
 
             os.replace(self._temp_file, self._config_path)
-            self._config_changed = False
         except OSError as e:
             with suppress(Exception):
                 from src.modules import Logger
@@ -215,6 +255,56 @@ class ConfigManage:
                 if self._temp_file.exists():
                     self._temp_file.unlink()
 
+    def installation_salt(self) -> bytes:
+        """密钥派生使用的安装盐, 首次使用时生成并立即保存"""
+        with self._lock:
+            try:
+                salt = bytes.fromhex(self.kdf_salt)
+            except ValueError:
+                salt = b""
+            if len(salt) != 16:
+                salt = os.urandom(16)
+                self.kdf_salt = salt.hex()
+                self.flush()
+            return salt
+
+    def verify_key(self) -> None:
+        """在任何加解密操作前校验密钥, 与记录的校验值不符时抛出 TASCipherException"""
+        if not self.pwd:
+            return
+        from src.modules.exceptions import TASCipherException
+        from src.modules.account.rotation import KeyRotation
+        if KeyRotation.pending():
+            raise TASCipherException("密钥轮换尚未完成, 请先重新执行 --rotate-key")
+        if not self.key_check:
+            return
+        from src.modules.aes_crypto import AESCipher
+        cipher = AESCipher(self.pwd)
+        if not cipher.matches(self.key_check):
+            raise TASCipherException("密钥错误")
+        if not self.key_check.startswith(f"{AESCipher.KDF_ID}:"):
+            # 旧的校验值可被快速穷举, 校验通过后升级为当前派生方式
+            self.key_check = cipher.key_check()
+
+    def remember_key(self, cipher=None) -> None:
+        """密钥已被成功解密证实后, 记录其校验值; cipher 为 None 时使用配置中的密钥"""
+        if cipher is None and self.pwd:
+            from src.modules.aes_crypto import AESCipher
+            cipher = AESCipher(self.pwd)
+        if cipher is not None and not self.key_check:
+            self.key_check = cipher.key_check()
+
+    def has_tag(self, tag: str) -> bool:
+        """标签是否已注册; 启用注册表时走索引查询"""
+        if self.registry:
+            from src.modules.account.registry import AccountRegistry
+            return AccountRegistry().contains(tag)
+
+        tags = self.tags
+        if self._tag_set is None or self._tag_set[0] is not tags:
+            self._tag_set = (tags, frozenset(tags))
+        return tag in self._tag_set[1]
+
     def watch_time(self) -> str:
         return format_timedelta(datetime.now() - self.start_time)
 
@@ -268,6 +358,11 @@ class ConfigManage:
         """设置解密密钥"""
         self._password = str(value) if value is not None else ""
 
+    @property
+    def worker_count(self) -> int:
+        """批量加解密的并发数: 未配置 workers 时按核心数决定"""
+        return max(1, self.workers or min(32, (os.cpu_count() or 1) + 4))
+
     @property
     def decrypted(self) -> bool:
         """获取解密状态"""
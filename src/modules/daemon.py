@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# @File ： daemon.py
+# @Time : 2026/10/18 15:30
+# @Author : Zropk
+import os
+import threading
+from contextlib import suppress
+from multiprocessing.connection import Listener, AuthenticationError
+from typing import Any, Callable, Dict
+
+from src.ipc import FAMILY, daemon_address, load_authkey, send_command
+from src.modules.exceptions import TASException
+from src.modules.logger import Logger
+
+Handler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+class TASDaemon:
+    """
+    常驻进程
+    保持配置、账户索引、进程快照等状态常驻内存, 通过本地 IPC 接收轻量客户端转发的命令
+    """
+
+    def __init__(self, handlers: Dict[str, Handler]):
+        self.logger = Logger()
+        self._handlers = handlers
+        self._running = False
+
+    def _already_running(self) -> bool:
+        """检查是否已有常驻进程在运行"""
+        return send_command({"action": "ping"}) is not None
+
+    def serve(self) -> None:
+        """启动常驻进程并阻塞处理命令"""
+        if self._already_running():
+            self.logger.warning("常驻进程已在运行.")
+            return
+
+        address = daemon_address()
+        if FAMILY == "AF_UNIX":
+            with suppress(FileNotFoundError):
+                os.unlink(address)
+
+        authkey = load_authkey(create=True)
+        self._running = True
+        with Listener(address, FAMILY, authkey=authkey) as listener:
+            self.logger.info(f"常驻进程已启动 -> {address}")
+            while self._running:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, OSError, EOFError):
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+        if FAMILY == "AF_UNIX":
+            with suppress(FileNotFoundError):
+                os.unlink(address)
+        self.logger.info("常驻进程已退出.")
+
+    def _handle(self, conn) -> None:
+        """处理单个连接"""
+        action = None
+        with conn:
+            try:
+                command = conn.recv()
+                action = command.get("action")
+                if action == "ping":
+                    reply = {"ok": True, "message": "pong"}
+                elif action == "stop":
+                    reply = {"ok": True, "message": "常驻进程正在退出."}
+                elif handler := self._handlers.get(action):
+                    reply = handler(command)
+                else:
+                    reply = {"ok": False, "message": f"未知命令: {action}"}
+            except TASException as e:
+                reply = {"ok": False, "message": e.message}
+            except Exception as e:
+                self.logger.exception("处理常驻进程命令失败.", e)
+                reply = {"ok": False, "message": str(e)}
+            with suppress(OSError, ValueError):
+                conn.send(reply)
+        if action == "stop":
+            self.stop()
+
+    def stop(self) -> None:
+        """停止常驻进程"""
+        self._running = False
+        # 唤醒阻塞中的 accept, 使主循环退出
+        send_command({"action": "ping"})
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# @File ： encryption_state.py
+# @Time : 2026/10/18 20:35
+# @Author : Zropk
+import atexit
+import json
+import os
+import sqlite3
+from contextlib import suppress
+from threading import RLock
+from typing import Dict, List
+
+from src.modules.config_manager import ConfigManage
+
+
+def _key(path: str | os.PathLike) -> str:
+    return os.path.abspath(path)
+
+
+def _identity(st: os.stat_result) -> List[int]:
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+class EncryptionStateCache:
+    """
+    加密状态缓存, 持久化到 encryption_state.json (启用注册表时存入 accounts.db, 按需逐条查询, 无需整体载入)
+    以 (路径, inode, 大小, 修改时间) 标识文件, 文件未变化时只需一次 stat 即可得知其加密状态, 无需读取文件头
+    """
+
+    _instance = None
+    _lock = RLock()
+
+    def __new__(cls):
+        with cls._lock:
+            if not cls._instance:
+                cls._instance = super().__new__(cls)
+                cls._instance.__initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """初始化"""
+        if self.__initialized:
+            return
+
+        config = ConfigManage()
+        self._cache_path = config.config_file.with_name("encryption_state.json")
+        self._registry = None
+        if config.registry:
+            from src.modules.account.registry import AccountRegistry
+            self._registry = AccountRegistry()
+        self._entries: Dict[str, list] = {} if self._registry else self._load()
+        # 尚未写入磁盘的记录, 保存时与文件内容合并, 多个进程可共用同一文件
+        self._pending: Dict[str, list] = {}
+        atexit.register(self.flush)
+        self.__initialized = True
+
+    def _load(self) -> Dict[str, list]:
+        with suppress(OSError, json.JSONDecodeError, TypeError, ValueError):
+            with open(self._cache_path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            return {str(k): list(v) for k, v in loaded.items() if isinstance(v, list) and len(v) == 4}
+        return {}
+
+    def get(self, path: str | os.PathLike, st: os.stat_result) -> bool | None:
+        """返回缓存的加密状态; 文件已变化或未缓存时返回 None"""
+        key = _key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._registry is not None:
+                entry = self._entries[key] = self._registry.file_state(key)
+        if entry is None or entry[:3] != _identity(st):
+            return None
+        return bool(entry[3])
+
+    def put(self, path: str | os.PathLike, st: os.stat_result, encrypted: bool) -> None:
+        """记录文件的加密状态"""
+        entry = [*_identity(st), int(encrypted)]
+        key = _key(path)
+        with self._lock:
+            if self._entries.get(key) != entry:
+                self._entries[key] = self._pending[key] = entry
+
+    def flush(self) -> None:
+        """将新记录合并写入 encryption_state.json (仅作缓存, 写入失败不影响功能)"""
+        with self._lock:
+            if not self._pending:
+                return
+            if self._registry is not None:
+                with suppress(sqlite3.Error):
+                    self._registry.put_file_states(self._pending)
+                self._pending = {}
+                return
+            entries = self._load()
+            entries.update(self._pending)
+            self._pending = {}
+            # 清理已不存在的文件
+            entries = {key: entry for key, entry in entries.items() if os.path.exists(key)}
+            self._entries.update(entries)
+
+            temp_file = self._cache_path.with_suffix(".tmp")
+            with suppress(OSError):
+                with open(temp_file, "w", encoding="utf-8") as f:
+                    json.dump(entries, f, ensure_ascii=False)
+                os.replace(temp_file, self._cache_path)
@@ -3,24 +3,47 @@
 # @Author : Zropk
 import threading
 import json
+import os
 import sys
+import time
 from pathlib import Path
 
-from PySide6.QtWidgets import QApplication, QMessageBox
-from PySide6.QtCore import QObject, Signal
 from contextlib import suppress
 from loguru import logger
 
+_log_signals = None
+_signals_lock = threading.Lock()
 
-class LogSignals(QObject):
-    show_popup = Signal(str, str, QMessageBox.Icon)
 
+def is_headless() -> bool:
+    """无界面模式: 设置了 TAS_HEADLESS 环境变量, 或非 Windows 下没有可用的显示环境"""
+    if os.environ.get("TAS_HEADLESS", "").lower() in ("1", "true", "yes"):
+        return True
+    if sys.platform == "win32":
+        return False
+    return not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
 
-log_signals = LogSignals()
+
+def get_log_signals():
+    """首次弹窗时才导入 PySide6 并创建信号对象"""
+    global _log_signals
+    with _signals_lock:
+        if _log_signals is None:
+            from PySide6.QtCore import QObject, Signal
+            from PySide6.QtWidgets import QMessageBox
+
+            class LogSignals(QObject):
+                show_popup = Signal(str, str, QMessageBox.Icon)
+
+            _log_signals = LogSignals()
+            _log_signals.show_popup.connect(show_message)
+    return _log_signals
 
 
 def show_message(title, message, level):
     """显示弹窗"""
+    from PySide6.QtWidgets import QApplication, QMessageBox
+
     app = QApplication.instance()
     if app is None:
         app = QApplication(sys.argv)
@@ -31,12 +54,54 @@ def show_message(title, message, level):
     msg_box.exec()
 
 
+class SizeTimeRotation:
+    """日志轮转条件: 文件超过指定大小或写入时间超过指定间隔"""
+
+    def __init__(self, max_bytes: int, interval: float):
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self._opened_at: float | None = None
+
+    @staticmethod
+    def _created_at(file) -> float:
+        stat = os.fstat(file.fileno())
+        return getattr(stat, "st_birthtime", stat.st_ctime if sys.platform == "win32" else time.time())
+
+    def __call__(self, message, file) -> bool:
+        if self._opened_at is None:
+            self._opened_at = self._created_at(file)
+        if file.tell() + len(message) > self.max_bytes or time.time() - self._opened_at >= self.interval:
+            self._opened_at = time.time()
+            return True
+        return False
+
+
+def _format_popup(record) -> str:
+    full_message = record["message"]
+    if exception := record.get("exception", None):
+        full_message += f"\n\n{exception}"
+    return full_message
+
+
 def setup_popup_handler():
-    """弹窗处理器"""
+    """弹窗处理器; 无界面模式下改为输出到标准错误"""
 
     def popup_sink(message):
-        extra = message.record.get("extra", {})
-        if not extra.get("popup", False):
+        record = message.record
+        if not record.get("extra", {}).get("popup", False):
+            return
+
+        if Logger.headless:
+            if sys.stderr is not None:
+                print(f"[{record['level'].name}] {_format_popup(record)}", file=sys.stderr, flush=True)
+            return
+
+        try:
+            log_signals = get_log_signals()
+            from PySide6.QtWidgets import QMessageBox
+        except ImportError:
+            Logger.headless = True
+            popup_sink(message)
             return
 
         level_map = {
@@ -48,29 +113,23 @@ def setup_popup_handler():
             "EXCEPTION": QMessageBox.Icon.Critical,
         }
 
-        level_icon = level_map.get(
-            message.record["level"].name, QMessageBox.Icon.Information
-        )
-        full_message = message.record["message"]
-
-        if exception := message.record.get("exception", None):
-            full_message += f"\n\n{exception}"
-
-        log_signals.show_popup.emit(
-            message.record["level"].name, full_message, level_icon
-        )
+        level_icon = level_map.get(record["level"].name, QMessageBox.Icon.Information)
+        log_signals.show_popup.emit(record["level"].name, _format_popup(record), level_icon)
 
     logger.add(popup_sink, filter=lambda record: record["extra"].get("popup", False))
 
 
-log_signals.show_popup.connect(show_message)
-
-
 class Logger:
     """日志记录器"""
 
     _instance = None
     _lock = threading.Lock()
+    headless = is_headless()
+
+    LOG_FILE = "TAS.jsonl"
+    LOG_MAX_BYTES = 10 * 1024 * 1024
+    LOG_INTERVAL = 24 * 60 * 60
+    LOG_RETENTION = 10
 
     def __new__(cls):
         if cls._instance is None:
@@ -93,7 +152,14 @@ class Logger:
             "<level>{message}</level>"
         )
         with suppress(TypeError):
-            logger.add(sys.stderr, format=log_format, level="DEBUG", colorize=True)
+            # 无界面模式下弹窗消息由弹窗处理器输出, 避免重复打印
+            logger.add(
+                sys.stderr,
+                format=log_format,
+                level="DEBUG",
+                colorize=True,
+                filter=lambda record: not (Logger.headless and record["extra"].get("popup", False)),
+            )
 
         with suppress(json.JSONDecodeError, IOError):
             from src.modules.config_manager import ConfigManage
@@ -102,17 +168,30 @@ class Logger:
             if config_file.exists():
                 with open(config_file, "r", encoding="utf-8") as f:
                     if json.load(f).get("log_output", False):
-                        # log_file_path = os.getcwd()
+                        # 结构化 JSONL 输出, 由后台线程写入, 不阻塞切换与监控
                         logger.add(
-                            'TAS.log',
-                            rotation="10 MB",
+                            Logger.LOG_FILE,
+                            rotation=SizeTimeRotation(Logger.LOG_MAX_BYTES, Logger.LOG_INTERVAL),
+                            retention=Logger.LOG_RETENTION,
+                            compression="zip",
                             encoding="utf-8",
-                            format=log_format,
+                            serialize=True,
+                            enqueue=True,
                             level="DEBUG",
                         )
 
         setup_popup_handler()
 
+    @classmethod
+    def set_headless(cls, headless: bool = True) -> None:
+        """切换无界面模式"""
+        cls.headless = headless
+
+    @staticmethod
+    def complete() -> None:
+        """等待后台日志队列写入完成"""
+        logger.complete()
+
     @staticmethod
     def log(level, message, popup=False, **kwargs):
         """通用日志记录方法"""
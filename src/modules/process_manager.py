@@ -3,82 +3,125 @@
 # @Author : Zropk
 import subprocess
 import time
+import sys
+import os
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
 from contextlib import suppress
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterable
 import asyncio
 import psutil
 
 from src.modules import ConfigManage
 from src.modules.exceptions import TASException
 from src.modules.logger import Logger
+from src.modules.process_snapshot import ProcessSnapshot
+from src.modules.readiness import ReadinessProbe, TdataActivityProbe
+from src.modules.stats import SwitchStats
+from src.modules.tracer import Tracer
+
+
+class LaunchHandle:
+    """客户端启动句柄, 以 Popen 对象为进程状态的唯一来源"""
+
+    def __init__(self, popen: subprocess.Popen):
+        self.popen = popen
+        self.pid = popen.pid
+        self.exit_future: Future = Future()
+        self.monitored = False
+        self.started_at = time.monotonic()
+        self.ready_time: float | None = None
+
+    @property
+    def running(self) -> bool:
+        """客户端是否仍在运行"""
+        return not self.exit_future.done() and self.popen.poll() is None
+
+    def set_exited(self) -> None:
+        """标记客户端已退出并回收进程"""
+        if not self.exit_future.done():
+            with suppress(InvalidStateError):
+                self.exit_future.set_result(self.popen.poll())
+
+    def wait(self, timeout: float | None = None) -> int | None:
+        """阻塞等待客户端退出, 返回退出码"""
+        if not self.monitored:
+            with suppress(subprocess.TimeoutExpired):
+                self.popen.wait(timeout)
+                self.set_exited()
+        return self.exit_future.result(timeout)
 
 
 class ProcessManager:
     @staticmethod
-    def start_process(configs: ConfigManage):
-        """客户端启动函数"""
+    def start_process(
+            configs: ConfigManage,
+            probe: ReadinessProbe | None = None,
+            extra_args: Iterable[str] = (),
+    ) -> LaunchHandle | None:
+        """客户端启动函数, 等待客户端就绪后返回启动句柄; 启动失败时返回 None"""
+        logger = Logger()
+        stats = SwitchStats()
+        probe = probe or TdataActivityProbe(Path(configs.path) / "tdata")
+        probe.prime()
         try:
             full_path = Path(configs.path) / configs.client
 
-            subprocess.Popen(
-                args=str(full_path),
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                stdin=subprocess.DEVNULL,
-                shell=False,
-                start_new_session=True,
-            )
+            with stats.phase("spawn"):
+                popen = subprocess.Popen(
+                    args=[str(full_path), *extra_args],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    stdin=subprocess.DEVNULL,
+                    shell=False,
+                    start_new_session=True,
+                )
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"客户端启动失败: {e}")
+            return None
 
-            max_time = 15
-            interval = 0.2
-            start_time = time.monotonic()
+        handle = LaunchHandle(popen)
+        configs.process_status = True
 
-            while not configs.process_status:
-                if time.monotonic() - start_time > max_time:
-                    return False
-                time.sleep(interval)
-
-            return configs.process_status
-
-        except (FileNotFoundError, TypeError, PermissionError):
-            return False
+        with Tracer().span("ready_probe", pid=handle.pid):
+            handle.ready_time = probe.wait(handle, configs.ready_timeout)
+        if handle.ready_time is not None:
+            stats.record("ready", handle.ready_time)
+            logger.info(f"客户端已就绪, 耗时 {handle.ready_time:.3f}s.")
+        elif not handle.running:
+            handle.set_exited()
+            configs.process_status = False
+            logger.error(f"客户端启动后立即退出, 退出码: {handle.exit_future.result()}")
+            return None
+        else:
+            logger.warning(f"客户端在 {configs.ready_timeout}s 内未就绪, 继续监控.")
+        return handle
 
     @staticmethod
-    def kill_process(client: str):
-        """终止所有匹配的进程"""
+    def kill_process(client: str, exclude: Iterable[int] = ()):
+        """终止所有匹配的进程, exclude 中的 PID (如多开实例) 除外"""
         if not isinstance(client, str):
             raise TypeError(f"{client} 必须为 {str}, 但实际为 {type(client)}")
 
-        killed = False
-        processes_to_kill = []
-        access_denied = False
-
-        for process in psutil.process_iter(['name']):
-            if client == process.info['name']:
-                processes_to_kill.append(process)
+        with SwitchStats().phase("kill"):
+            return ProcessManager._kill_all(client, set(exclude))
 
+    @staticmethod
+    def _kill_all(client: str, exclude: set) -> bool:
+        """终止并等待所有匹配的进程退出"""
+        processes_to_kill = [
+            process for process in ProcessSnapshot().processes(client, force=True)
+            if process.pid not in exclude
+        ]
         if not processes_to_kill:
             return False
 
-        for process in processes_to_kill:
-            try:
-                process.terminate()
-                killed = True
-            except psutil.AccessDenied:
-                access_denied = True
-            except psutil.NoSuchProcess:
-                continue
+        killed, access_denied = ProcessManager._signal_all(processes_to_kill, "terminate")
 
         gone, alive = psutil.wait_procs(processes_to_kill, timeout=3)
         if alive:
-            for p in alive:
-                try:
-                    p.kill()
-                except psutil.AccessDenied:
-                    access_denied = True
-                except psutil.NoSuchProcess:
-                    pass
+            _, denied = ProcessManager._signal_all(alive, "kill")
+            access_denied = access_denied or denied
 
         if access_denied and not killed:
             raise TASException(
@@ -87,15 +130,117 @@ class ProcessManager:
 
         return killed
 
+    @staticmethod
+    def _signal_all(processes: list, method: str) -> tuple[bool, bool]:
+        """
+        并行向所有进程发送 terminate/kill
+        返回: (是否至少成功一次, 是否存在权限不足)
+        """
+
+        def send(process) -> bool | None:
+            try:
+                getattr(process, method)()
+                return True
+            except psutil.AccessDenied:
+                return False
+            except psutil.NoSuchProcess:
+                return None
+
+        if len(processes) == 1:
+            results = [send(processes[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(processes), 8)) as executor:
+                results = list(executor.map(send, processes))
+        return any(r is True for r in results), any(r is False for r in results)
+
+
+class PollingExitBackend:
+    """轮询后端, 定期检查进程是否仍在运行"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+
+    @staticmethod
+    def is_running(pid: int) -> bool:
+        with suppress(psutil.NoSuchProcess, psutil.AccessDenied):
+            process = psutil.Process(pid)
+            return process.is_running() and process.status() != psutil.STATUS_ZOMBIE
+        return False
+
+    async def wait_exit(self, pid: int) -> None:
+        """等待进程退出"""
+        loop = asyncio.get_running_loop()
+        while await loop.run_in_executor(None, self.is_running, pid):
+            await asyncio.sleep(self.interval)
+
+
+class PidfdExitBackend:
+    """Linux 后端, 在事件循环中等待 pidfd 可读 (进程退出), 运行期间无任何唤醒"""
+
+    async def wait_exit(self, pid: int) -> None:
+        """等待进程退出"""
+        try:
+            fd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return
+        except OSError:
+            # 内核不支持 pidfd 时回退为轮询
+            return await PollingExitBackend().wait_exit(pid)
+
+        loop = asyncio.get_running_loop()
+        exited = loop.create_future()
+        loop.add_reader(fd, lambda: exited.done() or exited.set_result(None))
+        try:
+            await exited
+        finally:
+            loop.remove_reader(fd)
+            os.close(fd)
+
+
+class HandleExitBackend:
+    """进程句柄后端, 在线程中阻塞等待进程句柄 (Windows 下为 WaitForSingleObject)"""
+
+    async def wait_exit(self, pid: int) -> None:
+        """等待进程退出"""
+        try:
+            process = psutil.Process(pid)
+        except psutil.NoSuchProcess:
+            return
+        loop = asyncio.get_running_loop()
+        with suppress(psutil.NoSuchProcess):
+            await loop.run_in_executor(None, process.wait)
+
+
+def default_exit_backend():
+    """根据平台选择进程退出检测后端"""
+    if sys.platform.startswith("linux") and hasattr(os, "pidfd_open"):
+        return PidfdExitBackend()
+    if sys.platform == "win32":
+        return HandleExitBackend()
+    return PollingExitBackend()
+
 
 class ProcessMonitor:
-    def __init__(self, process_name: str, *, check_interval: float = 0.5):
+    def __init__(self, process_name: str, *, check_interval: float = 0.5, backend=None):
         self.process_name = process_name
         self._callbacks = []
         self.check_interval = check_interval
+        self.backend = backend or default_exit_backend()
         self._watch_task = None
         self.logger = Logger()
         self.last_PID = None
+        self._handle: LaunchHandle | None = None
+        self._loop = None
+        self._attached = None
+
+    def attach(self, handle: LaunchHandle):
+        """绑定启动句柄, 此后以句柄的 PID 为准, 不再按名称查找 (线程安全)"""
+        handle.monitored = True
+        self._handle = handle
+        self.last_PID = handle.pid
+        if self._loop is not None and not self._loop.is_closed():
+            with suppress(RuntimeError):
+                self._loop.call_soon_threadsafe(self._attached.set)
 
     def add_callback(self, callback: Callable):
         """添加状态变化回调函数"""
@@ -123,27 +268,54 @@ class ProcessMonitor:
                 await self._watch_task
 
     async def _watch(self):
-        """监控主循环"""
+        """监控主循环: 发现进程后阻塞等待其退出, 而非周期性检查"""
+        self._loop = asyncio.get_running_loop()
+        self._attached = asyncio.Event()
         last_status = None
         while True:
             try:
-                current_status = await self._check_status()
+                handle = self._handle
+                with Tracer().span("monitor_tick", attached=handle is not None):
+                    if handle is not None:
+                        running = handle.running
+                    else:
+                        running = await self._check_status()
 
-                if current_status != last_status:
-                    for callback in self._callbacks:
-                        try:
-                            asyncio.create_task(callback(current_status))
-                        except Exception as e:
-                            self.logger.exception(f"函数回调失败.", e)
-                    last_status = current_status
+                if not running:
+                    if handle is not None:
+                        handle.set_exited()
+                    if last_status is not False:
+                        self._notify(False)
+                        last_status = False
+                    # 已绑定句柄时无需轮询, 等待下一次绑定即可
+                    timeout = None if handle is not None else self.check_interval
+                    with suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(self._attached.wait(), timeout)
+                    self._attached.clear()
+                    continue
 
-                await asyncio.sleep(self.check_interval)
+                if last_status is not True:
+                    self._notify(True)
+                    last_status = True
+                with Tracer().span("monitor_wait_exit", backend=type(self.backend).__name__):
+                    await self.backend.wait_exit(handle.pid if handle is not None else self.last_PID)
+                if handle is not None:
+                    handle.set_exited()
+                self.last_PID = None
             except asyncio.CancelledError:
                 raise
             except Exception as e:
                 self.logger.exception(f"监控错误", e)
                 await asyncio.sleep(5)
 
+    def _notify(self, status: bool):
+        """通知状态变化"""
+        for callback in self._callbacks:
+            try:
+                asyncio.create_task(callback(status))
+            except Exception as e:
+                self.logger.exception(f"函数回调失败.", e)
+
     async def _check_status(self) -> bool:
         """检查进程状态"""
         loop = asyncio.get_running_loop()
@@ -158,18 +330,10 @@ class ProcessMonitor:
                     if process.is_running() and process.name() == process_name:
                         return True
 
-            for proc in psutil.process_iter(['name', 'pid']):
-                try:
-                    proc_name = proc.info.get('name')
-                    if proc_name == process_name:
-                        self.last_PID = proc.pid
-                        return True
-                except (
-                        psutil.NoSuchProcess,
-                        psutil.AccessDenied,
-                        psutil.ZombieProcess,
-                ):
-                    continue
+            pids = ProcessSnapshot().pids(process_name)
+            if pids:
+                self.last_PID = pids[0]
+                return True
             return False
         except Exception as e:
             self.logger.exception(f"检查进程状态时出现错误.", e)
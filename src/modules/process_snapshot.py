@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# @File ： process_snapshot.py
+# @Time : 2026/10/18 14:25
+# @Author : Zropk
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import suppress
+from threading import RLock
+from typing import Dict, List
+
+import psutil
+
+# Linux 下 /proc/<pid>/comm 最多保留 15 个字符
+_COMM_LEN = 15
+
+
+class ProcessSnapshot:
+    """进程表快照, 每个周期只枚举一次进程并按名称建立索引, 供所有调用方共享"""
+
+    _instance = None
+    _lock = RLock()
+    # procfs 挂载位置 (基准测试中指向合成的进程表)
+    PROC_ROOT = "/proc"
+
+    def __new__(cls):
+        with cls._lock:
+            if not cls._instance:
+                cls._instance = super().__new__(cls)
+                cls._instance.__initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """初始化"""
+        if self.__initialized:
+            return
+
+        self.ttl = 0.5
+        self._taken_at = float("-inf")
+        self._by_name: Dict[str, List[int]] = {}
+        self._use_proc = sys.platform.startswith("linux") and os.path.isdir(self.PROC_ROOT)
+        self.__initialized = True
+
+    def _scan_proc(self) -> Dict[str, List[int]]:
+        """直接读取 /proc/<pid>/comm, 避免为每个进程构造 psutil 对象"""
+        index = defaultdict(list)
+        for entry in os.scandir(self.PROC_ROOT):
+            if not entry.name.isdigit():
+                continue
+            with suppress(OSError):
+                with open(os.path.join(entry.path, "comm"), "rb") as f:
+                    name = f.read().rstrip(b"\n").decode("utf-8", "replace")
+                index[name].append(int(entry.name))
+        return index
+
+    @staticmethod
+    def _scan_psutil() -> Dict[str, List[int]]:
+        """通过 psutil 枚举, 只获取名称属性"""
+        index = defaultdict(list)
+        for process in psutil.process_iter(["name"]):
+            index[process.info["name"]].append(process.pid)
+        return index
+
+    def refresh(self, force: bool = False) -> None:
+        """刷新快照; 未过期时直接复用"""
+        with self._lock:
+            if not force and time.monotonic() - self._taken_at < self.ttl:
+                return
+            self._by_name = self._scan_proc() if self._use_proc else self._scan_psutil()
+            self._taken_at = time.monotonic()
+
+    def pids(self, name: str, force: bool = False) -> List[int]:
+        """返回指定名称的所有进程 PID"""
+        self.refresh(force)
+        if not self._use_proc or len(name) < _COMM_LEN:
+            return list(self._by_name.get(name, ()))
+
+        # comm 被截断时需再次核对完整名称
+        matched = []
+        for pid in self._by_name.get(name[:_COMM_LEN], ()):
+            with suppress(psutil.Error):
+                if psutil.Process(pid).name() == name:
+                    matched.append(pid)
+        return matched
+
+    def processes(self, name: str, force: bool = False) -> List[psutil.Process]:
+        """返回指定名称的所有进程对象"""
+        processes = []
+        for pid in self.pids(name, force):
+            with suppress(psutil.Error):
+                processes.append(psutil.Process(pid))
+        return processes
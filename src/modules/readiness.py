@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# @File ： readiness.py
+# @Time : 2026/10/18 13:40
+# @Author : Zropk
+import os
+import time
+from abc import ABC, abstractmethod
+from contextlib import suppress
+from pathlib import Path
+
+import psutil
+
+# 客户端运行期间在 tdata 中持有的锁文件
+LOCK_FILES = ("working",)
+
+
+class ReadinessProbe(ABC):
+    """客户端就绪探针基类"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+
+    def prime(self) -> None:
+        """启动客户端前调用, 记录用于比较的初始状态"""
+
+    @abstractmethod
+    def is_ready(self, handle) -> bool:
+        """判断客户端是否已就绪"""
+
+    def wait(self, handle, deadline: float) -> float | None:
+        """
+        等待客户端就绪
+        返回从启动到就绪的耗时 (秒); 进程退出或超过期限时返回 None
+        """
+        while handle.running:
+            if self.is_ready(handle):
+                return time.monotonic() - handle.started_at
+            if time.monotonic() - handle.started_at > deadline:
+                return None
+            time.sleep(self.interval)
+        return None
+
+
+class ProcessExistsProbe(ReadinessProbe):
+    """进程存在即视为就绪"""
+
+    def is_ready(self, handle) -> bool:
+        return True
+
+
+class TdataActivityProbe(ReadinessProbe):
+    """根据 tdata 中锁文件的创建及 key_datas 被打开判断客户端是否已加载账户"""
+
+    def __init__(self, tdata_path: str | Path, lock_files=LOCK_FILES, interval: float = 0.05):
+        super().__init__(interval)
+        self.tdata_path = Path(tdata_path)
+        self.lock_files = tuple(lock_files)
+        self._baseline: dict = {}
+        self.prime()
+
+    def _lock_mtime(self, name: str) -> int | None:
+        with suppress(OSError):
+            return os.stat(self.tdata_path / name).st_mtime_ns
+        return None
+
+    def prime(self) -> None:
+        """记录启动前锁文件的修改时间, 残留的锁文件不会被误判为就绪"""
+        self._baseline = {name: self._lock_mtime(name) for name in self.lock_files}
+
+    def _lock_created(self, handle) -> bool:
+        for name in self.lock_files:
+            mtime = self._lock_mtime(name)
+            if mtime is not None and mtime != self._baseline.get(name):
+                return True
+        return False
+
+    def _key_datas_opened(self, handle) -> bool:
+        with suppress(psutil.Error):
+            # tdata 可能为链接, 按实际指向的文件夹比较
+            tdata_path = self.tdata_path.resolve()
+            for opened in psutil.Process(handle.pid).open_files():
+                opened_path = Path(opened.path)
+                if opened_path.name == "key_datas" and opened_path.parent == tdata_path:
+                    return True
+        return False
+
+    def is_ready(self, handle) -> bool:
+        return self._lock_created(handle) or self._key_datas_opened(handle)
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# @File ： stats.py
+# @Time : 2026/10/18 17:20
+# @Author : Zropk
+import atexit
+import bisect
+import json
+import math
+import os
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager, suppress
+from threading import RLock
+from typing import Dict, Iterator
+
+from src.modules.config_manager import ConfigManage
+from src.modules.tracer import Tracer
+
+# 对数分桶: 0.1ms 起每档放大 1.2 倍, 覆盖到约 10 分钟
+_BUCKET_BOUNDS = [1e-4 * 1.2 ** i for i in range(90)]
+
+
+def _pad(text: str, width: int, left: bool = False) -> str:
+    """按显示宽度对齐 (中文字符占两列)"""
+    display = sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+    padding = " " * max(0, width - display)
+    return text + padding if left else padding + text
+
+
+class Histogram:
+    """对数分桶的耗时直方图, 可跨进程合并"""
+
+    def __init__(self, data: dict | None = None):
+        data = data or {}
+        self.buckets: Dict[int, int] = {int(k): int(v) for k, v in data.get("buckets", {}).items()}
+        self.count = int(data.get("count", 0))
+        self.total = float(data.get("total", 0.0))
+        self.max = float(data.get("max", 0.0))
+
+    def add(self, seconds: float) -> None:
+        index = min(bisect.bisect_left(_BUCKET_BOUNDS, seconds), len(_BUCKET_BOUNDS) - 1)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "Histogram") -> None:
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """返回分位数 (所在分桶的上界, 不超过最大值)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(_BUCKET_BOUNDS[index], self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "buckets": {str(k): v for k, v in sorted(self.buckets.items())},
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+        }
+
+
+class SwitchStats:
+    """切换各阶段耗时统计, 按阶段及账户记录直方图并持久化到 stats.json"""
+
+    _instance = None
+    _lock = RLock()
+
+    def __new__(cls):
+        with cls._lock:
+            if not cls._instance:
+                cls._instance = super().__new__(cls)
+                cls._instance.__initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """初始化"""
+        if self.__initialized:
+            return
+
+        self._stats_path = ConfigManage().config_file.with_name("stats.json")
+        # 尚未写入磁盘的增量, 保存时与文件内容合并, 多个进程可共用同一文件
+        self._pending: Dict[str, Dict[str, Histogram]] = {}
+        self._local = threading.local()
+        atexit.register(self.flush)
+        self.__initialized = True
+
+    @contextmanager
+    def account(self, tag: str | None) -> Iterator[None]:
+        """指定当前线程中后续阶段所属的账户"""
+        previous = getattr(self._local, "tag", None)
+        self._local.tag = tag
+        try:
+            yield
+        finally:
+            self._local.tag = previous
+
+    @contextmanager
+    def phase(self, name: str, tag: str | None = None, **trace_args) -> Iterator[None]:
+        """记录一个阶段的耗时, 启用跟踪时同时生成对应的区间 (trace_args 仅写入跟踪数据)"""
+        started = time.perf_counter()
+        try:
+            with Tracer().span(name, tag=tag or getattr(self._local, "tag", None) or "", **trace_args):
+                yield
+        finally:
+            self.record(name, time.perf_counter() - started, tag)
+
+    def record(self, name: str, seconds: float, tag: str | None = None) -> None:
+        """记录一次阶段耗时"""
+        tag = tag or getattr(self._local, "tag", None) or ""
+        with self._lock:
+            for key in ("*", tag) if tag else ("*",):
+                self._pending.setdefault(key, {}).setdefault(name, Histogram()).add(seconds)
+
+    def _load(self) -> Dict[str, Dict[str, Histogram]]:
+        with suppress(OSError, json.JSONDecodeError, TypeError, ValueError, AttributeError):
+            with open(self._stats_path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            return {
+                key: {name: Histogram(data) for name, data in phases.items()}
+                for key, phases in loaded.items()
+            }
+        return {}
+
+    def flush(self) -> None:
+        """将增量合并写入 stats.json (仅作统计, 写入失败不影响功能)"""
+        with self._lock:
+            if not self._pending:
+                return
+            stats = self._load()
+            for key, phases in self._pending.items():
+                for name, histogram in phases.items():
+                    stats.setdefault(key, {}).setdefault(name, Histogram()).merge(histogram)
+            self._pending = {}
+
+            temp_file = self._stats_path.with_suffix(".tmp")
+            with suppress(OSError):
+                with open(temp_file, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            key: {name: h.to_dict() for name, h in phases.items()}
+                            for key, phases in stats.items()
+                        },
+                        f,
+                        ensure_ascii=False,
+                    )
+                os.replace(temp_file, self._stats_path)
+
+    def report(self) -> str:
+        """生成各阶段及各账户的 p50/p95/p99 报告"""
+        self.flush()
+        stats = self._load()
+        if not stats:
+            return "暂无统计数据."
+
+        lines = []
+        for key in sorted(stats, key=lambda k: (k != "*", k)):
+            lines.append("全部账户:" if key == "*" else f"账户 '{key}':")
+            lines.append(
+                "  " + _pad("阶段", 10, left=True)
+                + "".join(_pad(title, 10 if title != "次数" else 8) for title in ("次数", "p50", "p95", "p99", "最大"))
+            )
+            for name, h in sorted(stats[key].items()):
+                lines.append(
+                    f"  {name:<10}{h.count:>8}"
+                    + "".join(f"{h.percentile(q) * 1000:>8.1f}ms" for q in (0.5, 0.95, 0.99))
+                    + f"{h.max * 1000:>8.1f}ms"
+                )
+        return "\n".join(lines)
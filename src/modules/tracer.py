@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# @File ： tracer.py
+# @Time : 2026/10/18 17:50
+# @Author : Zropk
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, suppress
+from threading import RLock
+from typing import Any, Dict, Iterator, List
+
+
+def _trace_output(argv: List[str]) -> str | None:
+    """从命令行中取出 --trace 的输出路径"""
+    for index, arg in enumerate(argv):
+        if arg == "--trace" and index + 1 < len(argv):
+            return argv[index + 1]
+        if arg.startswith("--trace="):
+            return arg.split("=", 1)[1]
+    return None
+
+
+class Tracer:
+    """
+    单次运行的跟踪器, 以 Chrome Trace Event 格式记录嵌套的耗时区间
+    在进程启动时根据 --trace 参数启用, 以便覆盖配置加载等早期步骤; 未启用时 span 不做任何记录
+    """
+
+    _instance = None
+    _lock = RLock()
+
+    def __new__(cls):
+        with cls._lock:
+            if not cls._instance:
+                cls._instance = super().__new__(cls)
+                cls._instance.__initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """初始化"""
+        if self.__initialized:
+            return
+
+        self.output = _trace_output(sys.argv[1:])
+        self._origin = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        if self.output:
+            atexit.register(self.save)
+        self.__initialized = True
+
+    @property
+    def enabled(self) -> bool:
+        return self.output is not None
+
+    def _now(self) -> float:
+        """相对启动时刻的微秒数"""
+        return (time.perf_counter_ns() - self._origin) / 1000
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        """记录一个耗时区间, 附带线程 ID"""
+        if not self.enabled:
+            yield
+            return
+
+        thread = threading.current_thread()
+        tid = threading.get_native_id()
+        started = self._now()
+        try:
+            yield
+        finally:
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": started,
+                "dur": self._now() - started,
+                "pid": self._pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = {key: str(value) for key, value in args.items()}
+            with self._lock:
+                self._threads.setdefault(tid, thread.name)
+                self._events.append(event)
+
+    def save(self, path: str | None = None) -> None:
+        """写出跟踪文件, 可在 chrome://tracing 或 Perfetto 中打开"""
+        path = path or self.output
+        if not path:
+            return
+        with self._lock:
+            metadata = [
+                {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self._threads.items()
+            ]
+            events = metadata + sorted(self._events, key=lambda event: event["ts"])
+        with suppress(OSError):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
@@ -31,7 +31,20 @@ class HelpWindow(QWidget):
             ("--switch", "-s", "切换指定标签的账号"),
             ("--password", "-p", "指定解密密钥"),
             ("--encrypt", "-e", "立即加密文件"),
-            ("--decrypt", "-d", "立即解密文件")
+            ("--decrypt", "-d", "立即解密文件"),
+            ("--stats", "", "查看各阶段耗时统计"),
+            ("--status", "", "查看各账户的加密状态"),
+            ("--migrate", "", "迁移旧格式的加密数据"),
+            ("--verify", "", "校验加密数据的完整性"),
+            ("--rotate-key", "", "更换加密密钥"),
+            ("--trace", "", "导出本次运行的跟踪数据"),
+            ("--launch", "", "多开启动指定账户"),
+            ("--stop", "", "停止多开实例"),
+            ("--instances", "", "查看多开实例状态"),
+            ("--daemon", "", "以常驻模式运行"),
+            ("--daemon-status", "", "查看常驻进程状态"),
+            ("--daemon-stop", "", "停止常驻进程"),
+            ("--headless", "", "无界面模式")
         ]
         self.ui.version_label.setText(f'TAS v{self.version}')
         self.ui.args_widget.setRowCount(len(self.help_datas))
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# @File ： conftest.py
+# @Time : 2026/10/18 23:10
+# @Author : Zropk
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+LAUNCHER = ROOT / "launcher.py"
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# 立即退出的客户端
+EXIT_CLIENT = "#!/bin/sh\n"
+# 保持运行的客户端: 记录启动参数并创建锁文件 (就绪探针据此判断), 多开时使用 -workdir 指定的目录
+IDLE_CLIENT = """#!/bin/sh
+dir="$(dirname "$0")"
+if [ "$1" = "-workdir" ]; then dir="$2"; fi
+echo "$@" > "$dir/client.args"
+touch "$dir/tdata/working"
+exec sleep 600
+"""
+
+
+def make_workspace(base: Path, tags=("t0", "t1"), client: str = EXIT_CLIENT, **config) -> Path:
+    """
+    构建测试用的工作目录: configs.json 与 Telegram 根目录
+    tdata 为默认账户 main, 每个标签各有一个账户文件夹, client 为客户端脚本的内容
+    """
+    root = base / "tg"
+    accounts = {"tdata": "main", **{f"acc-{tag}": tag for tag in tags}}
+    for folder, marker in accounts.items():
+        (root / folder / "D877F783D5D3EF8C").mkdir(parents=True)
+        (root / folder / marker).touch()
+        (root / folder / "key_datas").write_bytes(os.urandom(4096))
+        (root / folder / "D877F783D5D3EF8C" / "maps").write_bytes(os.urandom(70000))
+    client_file = root / "Telegram.exe"
+    client_file.write_text(client, encoding="utf-8")
+    client_file.chmod(0o755)
+
+    configs = {
+        "path": str(root), "default": "main", "tags": list(tags), "log_output": False, "client": client_file.name,
+    }
+    configs.update(config)
+    (base / "configs.json").write_text(json.dumps(configs), encoding="utf-8")
+    return base
+
+
+def run_tas(workspace: Path, *args: str, timeout: float = 60, **kwargs) -> subprocess.CompletedProcess:
+    """以无界面模式在工作目录中运行 launcher.py"""
+    return subprocess.run(
+        [sys.executable, str(LAUNCHER), *args],
+        cwd=workspace,
+        env={**os.environ, "TAS_HEADLESS": "1"},
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def workspace(tmp_path: Path) -> Path:
+    return make_workspace(tmp_path)
+
+
+def wait_until(predicate, timeout: float = 30, interval: float = 0.1, message: str = ""):
+    """轮询直到 predicate 返回真值并返回该值, 超时则测试失败"""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = predicate()
+        if result:
+            return result
+        assert time.monotonic() < deadline, message or "等待超时"
+        time.sleep(interval)
+
+
+def start_tas(workspace: Path, *args: str) -> subprocess.Popen:
+    """在后台以无界面模式运行 launcher.py (如常驻进程、多开监管进程)"""
+    return subprocess.Popen(
+        [sys.executable, str(LAUNCHER), *args],
+        cwd=workspace,
+        env={**os.environ, "TAS_HEADLESS": "1"},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+
+def decrypts_with(key_datas: Path, password: str) -> bool:
+    """key_datas 能否以指定密钥完整解密 (在子进程中执行, 不在测试进程中创建配置)"""
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from src.modules.aes_crypto import AESCipher;"
+        "f = open(sys.argv[2], 'rb'); b''.join(AESCipher(sys.argv[3])._open(f))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code, str(ROOT), str(key_datas), password],
+        cwd=tempfile.mkdtemp(),
+        capture_output=True,
+    )
+    return result.returncode == 0
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# @File ： test_account_index.py
+# @Time : 2026/10/19 02:10
+# @Author : Zropk
+import os
+import shutil
+
+import pytest
+
+from src.modules.account.account_index import AccountIndex
+from src.modules.config_manager import ConfigManage
+from tests.conftest import make_workspace
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    workspace = make_workspace(tmp_path, tags=("t0", "t1", "gone"))
+    shutil.rmtree(workspace / "tg" / "acc-gone")
+    monkeypatch.chdir(workspace)
+    ConfigManage._instance = AccountIndex._instance = None
+    scans = []
+    scan = AccountIndex._scan
+    monkeypatch.setattr(AccountIndex, "_scan", lambda self, *args: (scans.append(args), scan(self, *args)))
+    index = AccountIndex()
+    index.scans = scans
+    yield index
+    ConfigManage().flush()
+    ConfigManage._instance = AccountIndex._instance = None
+
+
+def test_missing_tag_is_cached_until_directory_changes(index, tmp_path):
+    assert index.find("t0") == "acc-t0"
+    assert len(index.scans) == 1
+    for _ in range(100):
+        assert index.find("gone") == ""
+    assert len(index.scans) == 1
+
+    # 未找到的结果可强制重新扫描 (标记文件放入已有文件夹时目录修改时间不变)
+    assert index.find("gone", recheck=True) == ""
+    assert len(index.scans) == 2
+
+    os.mkdir(tmp_path / "tg" / "acc-gone")
+    (tmp_path / "tg" / "acc-gone" / "gone").touch()
+    assert index.find("gone") == "acc-gone"
+    assert len(index.scans) == 3
+
+
+def test_missing_tags_persist_across_processes(index):
+    assert index.find("gone") == ""
+    AccountIndex._instance = None
+    assert AccountIndex().find("gone") == ""
+    assert len(index.scans) == 1
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# @File ： test_config_manager.py
+# @Time : 2026/10/19 01:20
+# @Author : Zropk
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from src.modules.config_manager import ConfigManage
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ConfigManage._instance = None
+    config = ConfigManage()
+    yield config
+    config.flush()
+    ConfigManage._instance = None
+
+
+def _saved(config) -> dict:
+    return json.loads(config.config_file.read_text(encoding="utf-8"))
+
+
+def test_debounced_save_uses_running_loop(config):
+    async def update():
+        config.tags = ["t0"]
+        assert isinstance(config._save_timer, asyncio.TimerHandle)
+        config.default = "main"
+        await asyncio.sleep(config.SAVE_DELAY + 0.2)
+
+    asyncio.run(update())
+    assert config._save_timer is None
+    assert _saved(config)["tags"] == ["t0"]
+    assert _saved(config)["default"] == "main"
+
+
+def test_save_pending_on_closed_loop_is_rescheduled(config):
+    async def update():
+        config.tags = ["t0"]
+
+    # 事件循环结束前定时保存尚未触发, 之后的修改改由定时器线程保存
+    asyncio.run(update())
+    config.default = "main"
+    time.sleep(config.SAVE_DELAY + 0.3)
+    assert _saved(config)["tags"] == ["t0"]
+    assert _saved(config)["default"] == "main"
+
+
+def test_reload_keeps_pending_changes(config):
+    config.tags = ["t0"]
+    config.reload()
+    assert config.tags == ["t0"]
+    assert _saved(config)["tags"] == ["t0"]
+
+
+def test_worker_count(config, monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 4)
+    assert config.worker_count == 8
+    config.workers = 3
+    assert config.worker_count == 3
+    monkeypatch.setattr("os.cpu_count", lambda: None)
+    config.workers = 0
+    assert config.worker_count == 5
+
+
+def test_updates_coalesce_into_one_write(config, monkeypatch):
+    saves, fsyncs = [], []
+    save, fsync = ConfigManage._save_config, os.fsync
+    monkeypatch.setattr(ConfigManage, "_save_config", lambda self, configs: (saves.append(1), save(self, configs)))
+    monkeypatch.setattr(os, "fsync", lambda fd: (fsyncs.append(fd), fsync(fd)))
+    # 防抖窗口足够长, 结果不受机器快慢影响
+    monkeypatch.setattr(ConfigManage, "SAVE_DELAY", 60)
+
+    for i in range(1000):
+        config.tags = [f"t{i}"]
+        config.workers = i
+    assert saves == [] and fsyncs == []
+
+    config.flush()
+    assert len(saves) == 1 and len(fsyncs) == 1
+    assert _saved(config)["tags"] == ["t999"] and _saved(config)["workers"] == 999
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+# @File ： test_folder_crypto.py
+# @Time : 2026/10/18 23:25
+# @Author : Zropk
+from src.modules.account.folder_crypto import MANIFEST_NAME, _walk
+from src.modules.readiness import LOCK_FILES
+
+
+def test_walk_skips_session_and_lock_files(tmp_path):
+    (tmp_path / "D877F783D5D3EF8C").mkdir()
+    for name in ("key_datas", MANIFEST_NAME, *LOCK_FILES, "t0", "settingss", "D877F783D5D3EF8C/maps", "x.tmp"):
+        (tmp_path / name).write_bytes(b"data")
+
+    assert sorted(_walk(tmp_path, {"t0"})) == ["D877F783D5D3EF8C/maps", "settingss"]
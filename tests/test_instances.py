@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# @File ： test_instances.py
+# @Time : 2026/10/18 23:40
+# @Author : Zropk
+import json
+import os
+import signal
+import sys
+
+import psutil
+import pytest
+
+from tests.conftest import IDLE_CLIENT, decrypts_with, make_workspace, run_tas, start_tas, wait_until
+
+PASSWORD = "secret"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="客户端为 shell 脚本")
+def test_single_mode_refuses_running_instance(workspace):
+    # 以测试进程本身模拟正在运行的多开实例
+    pid = os.getpid()
+    instances = {
+        "t0": {
+            "folder": "acc-t0",
+            "workdir": str(workspace / "instances" / "t0"),
+            "pid": pid,
+            "created": psutil.Process(pid).create_time(),
+            "supervisor": [pid, psutil.Process(pid).create_time()],
+            "has_backup": False,
+        }
+    }
+    (workspace / "instances.json").write_text(json.dumps(instances), encoding="utf-8")
+
+    result = run_tas(workspace, "-s", "t0")
+    assert "正以多开实例运行" in result.stdout + result.stderr
+    assert (workspace / "tg" / "tdata" / "main").exists()
+    assert (workspace / "tg" / "acc-t0" / "t0").exists()
+    assert not (workspace / "switch.journal").exists()
+
+
+@pytest.fixture
+def idle_workspace(tmp_path):
+    """客户端保持运行的工作目录, 账户数据已加密"""
+    workspace = make_workspace(tmp_path, client=IDLE_CLIENT, ready_timeout=5.0)
+    assert run_tas(workspace, "-e", "-p", PASSWORD).returncode == 0
+    return workspace
+
+
+def _instances(workspace) -> dict:
+    path = workspace / "instances.json"
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def _launch(workspace, tag: str):
+    """启动多开监管进程, 等待实例的客户端就绪"""
+    supervisor = start_tas(workspace, "--launch", tag, "-p", PASSWORD)
+
+    def started():
+        assert supervisor.poll() is None, supervisor.stdout.read()
+        return _instances(workspace).get(tag, {}).get("pid")
+
+    return supervisor, wait_until(started, message="实例未启动")
+
+
+def _check_launched(workspace, tag: str, pid: int) -> None:
+    workdir = workspace / "instances" / tag
+    # 客户端以 -workdir 启动, 工作目录中的 tdata 链接到账户文件夹, 账户数据已解密
+    assert (workdir / "client.args").read_text(encoding="utf-8").split() == ["-workdir", str(workdir)]
+    assert os.path.realpath(workdir / "tdata") == os.path.realpath(workspace / "tg" / f"acc-{tag}")
+    assert not decrypts_with(workspace / "tg" / f"acc-{tag}" / "key_datas", PASSWORD)
+    assert (workspace / "tg" / "tdata" / "main").exists()
+    entry = _instances(workspace)[tag]
+    assert entry["folder"] == f"acc-{tag}" and entry["workdir"] == str(workdir)
+    assert psutil.pid_exists(pid)
+
+
+def _check_released(workspace, tag: str) -> None:
+    assert tag not in _instances(workspace)
+    assert not os.path.lexists(workspace / "instances" / tag / "tdata")
+    assert decrypts_with(workspace / "tg" / f"acc-{tag}" / "key_datas", PASSWORD)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="客户端为 shell 脚本")
+def test_launch_status_stop(idle_workspace):
+    workspace = idle_workspace
+    supervisor, pid = _launch(workspace, "t0")
+    try:
+        _check_launched(workspace, "t0", pid)
+        status = run_tas(workspace, "--instances").stdout
+        assert f"t0: PID {pid}" in status
+
+        # 由另一进程停止, 监管进程负责还原后退出
+        stopped = run_tas(workspace, "--stop", "t0")
+        assert "已停止" in stopped.stdout + stopped.stderr
+        assert supervisor.wait(timeout=30) == 0
+        _check_released(workspace, "t0")
+        assert not psutil.pid_exists(pid) or psutil.Process(pid).status() == psutil.STATUS_ZOMBIE
+        assert "没有运行中的实例" in run_tas(workspace, "--instances").stdout
+    finally:
+        supervisor.kill()
+        supervisor.wait()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="客户端为 shell 脚本")
+def test_recover_after_supervisor_killed(idle_workspace):
+    workspace = idle_workspace
+    supervisor, pid = _launch(workspace, "t0")
+    _check_launched(workspace, "t0", pid)
+
+    # 监管进程与客户端均异常退出, 实例记录及解密的账户数据遗留
+    supervisor.send_signal(signal.SIGKILL)
+    supervisor.wait()
+    psutil.Process(pid).kill()
+    wait_until(lambda: not psutil.pid_exists(pid) or psutil.Process(pid).status() == psutil.STATUS_ZOMBIE)
+    assert "t0" in _instances(workspace)
+
+    # 下一次查看状态时恢复
+    assert "没有运行中的实例" in run_tas(workspace, "--instances", "-p", PASSWORD).stdout
+    _check_released(workspace, "t0")
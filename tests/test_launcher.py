@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# @File ： test_launcher.py
+# @Time : 2026/10/18 23:10
+# @Author : Zropk
+import sys
+
+import pytest
+
+from bench.bench_startup import qt_imports
+from src.ipc import build_command
+from tests.conftest import IDLE_CLIENT, decrypts_with, make_workspace, run_tas, start_tas, wait_until
+
+
+@pytest.mark.parametrize("argv", [["--daemon"], ["--daem"], ["--switch"], ["--status"]])
+def test_build_command_unsupported(argv):
+    assert build_command(argv) is None
+
+
+def test_build_command_forwarded():
+    assert build_command(["--daemon-status"]) == {"password": None, "action": "status"}
+    assert build_command(["-s", "t0", "-p", "pwd"]) == {"password": "pwd", "action": "switch", "tag": "t0"}
+
+
+@pytest.mark.parametrize("argv", [["--version"], ["--help"]])
+def test_headless_startup_skips_qt(workspace, argv):
+    assert qt_imports(workspace, *argv) == []
+
+
+@pytest.fixture
+def daemon():
+    """在工作目录中启动常驻进程, 测试结束后停止"""
+    processes = []
+
+    def start(workspace):
+        process = start_tas(workspace, "--daemon")
+        processes.append((workspace, process))
+
+        def running():
+            assert process.poll() is None, process.stdout.read()
+            return "常驻进程运行中" in run_tas(workspace, "--daemon-status").stdout
+
+        wait_until(running, message="常驻进程未启动")
+        return process
+
+    yield start
+    for workspace, process in processes:
+        if process.poll() is None:
+            run_tas(workspace, "--daemon-stop")
+            try:
+                process.wait(timeout=30)
+            except Exception:
+                process.kill()
+                process.wait()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="客户端为 shell 脚本")
+def test_launcher_daemon(workspace, daemon):
+    process = daemon(workspace)
+    assert run_tas(workspace, "--daemon-stop").returncode == 0
+    assert process.wait(timeout=30) == 0
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="客户端为 shell 脚本")
+def test_daemon_session_restores_with_its_own_key(tmp_path, daemon):
+    workspace = make_workspace(tmp_path, client=IDLE_CLIENT, ready_timeout=5.0)
+    assert run_tas(workspace, "-e", "-p", "secret").returncode == 0
+    daemon(workspace)
+
+    result = run_tas(workspace, "-s", "t0", "-p", "secret")
+    assert "已切换为 't0'" in result.stdout, result.stdout + result.stderr
+    # 会话进行中拒绝加解密, 以免修改其密钥
+    result = run_tas(workspace, "-e", "-p", "other")
+    assert result.returncode == 1 and "会话进行中" in result.stderr
+
+    # 客户端不以 Telegram.exe 为进程名, 按名称终止会遗漏, 需由会话自身的句柄终止
+    result = run_tas(workspace, "-s", "t1", timeout=90)
+    assert "已切换为 't1'" in result.stdout, result.stdout + result.stderr
+
+    key_datas = next(workspace.glob("tg/*/t0")).parent / "key_datas"
+    assert decrypts_with(key_datas, "secret")
+    assert not decrypts_with(key_datas, "")
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# @File ： test_process_manager.py
+# @Time : 2026/10/19 02:20
+# @Author : Zropk
+import asyncio
+import os
+import selectors
+import subprocess
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from src.modules.config_manager import ConfigManage
+from src.modules.process_manager import (
+    HandleExitBackend, LaunchHandle, PidfdExitBackend, PollingExitBackend, ProcessMonitor,
+)
+
+LIFETIME = 0.5
+
+BACKENDS = [
+    pytest.param(
+        PidfdExitBackend,
+        marks=pytest.mark.skipif(not hasattr(os, "pidfd_open"), reason="需要 Linux pidfd"),
+        id="pidfd",
+    ),
+    pytest.param(lambda: PollingExitBackend(interval=0.05), id="polling"),
+    pytest.param(HandleExitBackend, id="handle"),
+]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_wait_exit_returns_after_child_exits(backend):
+    child = subprocess.Popen([sys.executable, "-c", f"import time; time.sleep({LIFETIME})"])
+    started = time.perf_counter()
+    try:
+        asyncio.run(asyncio.wait_for(backend().wait_exit(child.pid), timeout=10))
+        elapsed = time.perf_counter() - started
+        assert child.wait(timeout=5) == 0
+    finally:
+        child.kill()
+        child.wait()
+    # 子进程退出前不应返回, 退出后应及时返回
+    assert LIFETIME <= elapsed < LIFETIME + 5
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_wait_exit_returns_for_exited_process(backend):
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    asyncio.run(asyncio.wait_for(backend().wait_exit(child.pid), timeout=5))
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """不阻塞的选择器: 没有就绪事件时直接把虚拟时钟推进到下一个定时器, 并统计事件循环的唤醒次数"""
+
+    def __init__(self, loop: "_VirtualClockLoop"):
+        super().__init__()
+        self._clock = loop
+
+    def select(self, timeout=None):
+        self._clock.wakeups += 1
+        events = super().select(0 if timeout is not None else 1.0)
+        if not events and timeout:
+            self._clock.offset += timeout
+        return events
+
+
+class _VirtualClockLoop(asyncio.SelectorEventLoop):
+    def __init__(self):
+        self.offset = 0.0
+        self.wakeups = 0
+        super().__init__(_VirtualSelector(self))
+
+    def time(self) -> float:
+        return super().time() + self.offset
+
+
+class _InlineExecutor(ThreadPoolExecutor):
+    """在调用线程中直接执行, 避免虚拟时钟越过仍在线程池中执行的任务"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+SESSION = 3600.0
+
+
+def _idle_session_wakeups(backend) -> int:
+    """在虚拟时钟下运行一小时的会话 (客户端空闲), 返回事件循环的唤醒次数"""
+    client = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(600)"])
+    loop = _VirtualClockLoop()
+    loop.set_default_executor(_InlineExecutor())
+
+    async def session():
+        monitor = ProcessMonitor("python", backend=backend)
+        monitor.attach(LaunchHandle(client))
+        await monitor.start_watching()
+        started = loop.wakeups
+        await asyncio.sleep(SESSION)
+        wakeups = loop.wakeups - started
+        await monitor.stop_watching()
+        return wakeups
+
+    try:
+        return loop.run_until_complete(session())
+    finally:
+        loop.close()
+        client.kill()
+        client.wait()
+
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ConfigManage._instance = None
+    yield
+    ConfigManage().flush()
+    ConfigManage._instance = None
+
+
+@pytest.mark.skipif(not hasattr(os, "pidfd_open"), reason="需要 Linux pidfd")
+def test_idle_session_wakeups(isolated):
+    wakeups = _idle_session_wakeups(PidfdExitBackend())
+    # 客户端运行期间只等待 pidfd, 一小时内的唤醒次数与会话时长无关
+    assert wakeups <= 5, wakeups
+
+    # 对照: 轮询后端每 0.5 秒唤醒一次, 验证计数方法有效
+    assert _idle_session_wakeups(PollingExitBackend(interval=0.5)) >= SESSION / 0.5
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# @File ： test_readiness.py
+# @Time : 2026/10/18 23:25
+# @Author : Zropk
+import os
+import time
+
+import pytest
+
+from src.modules.readiness import LOCK_FILES, ReadinessProbe, TdataActivityProbe
+
+
+class _Handle:
+    pid = os.getpid()
+
+
+def test_stale_lock_file_is_not_ready(tmp_path):
+    lock = tmp_path / LOCK_FILES[0]
+    lock.touch()
+    # 例如加密后被改写的锁文件, 修改时间可能晚于客户端启动
+    future = time.time() + 60
+    os.utime(lock, (future, future))
+
+    probe = TdataActivityProbe(tmp_path)
+    probe.prime()
+    assert not probe.is_ready(_Handle())
+
+    lock.write_bytes(b"")
+    os.utime(lock, None)
+    assert probe.is_ready(_Handle())
+
+
+def test_lock_file_created_after_launch(tmp_path):
+    probe = TdataActivityProbe(tmp_path)
+    probe.prime()
+    assert not probe.is_ready(_Handle())
+    (tmp_path / LOCK_FILES[0]).touch()
+    assert probe.is_ready(_Handle())
+
+
+def test_probe_requires_is_ready():
+    with pytest.raises(TypeError):
+        ReadinessProbe()
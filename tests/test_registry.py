@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# @File ： test_registry.py
+# @Time : 2026/10/19 01:35
+# @Author : Zropk
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.modules.account.account_index import AccountIndex
+from src.modules.account.registry import AccountRegistry
+from src.modules.aes_crypto import AESCipher
+from src.modules.config_manager import ConfigManage
+from src.modules.encryption_state import EncryptionStateCache
+from tests.conftest import ROOT, make_workspace, run_tas
+
+_SINGLETONS = (ConfigManage, AccountIndex, AccountRegistry, EncryptionStateCache)
+
+
+@pytest.fixture
+def registry_workspace(tmp_path, monkeypatch):
+    workspace = make_workspace(tmp_path, registry=True)
+    monkeypatch.chdir(workspace)
+    for cls in _SINGLETONS:
+        cls._instance = None
+    yield workspace
+    ConfigManage().flush()
+    for cls in _SINGLETONS:
+        cls._instance = None
+
+
+def test_status_shows_registry_usage(tmp_path):
+    workspace = make_workspace(tmp_path, registry=True)
+    subprocess.run(
+        [
+            sys.executable, "-c",
+            "import sys; sys.path.insert(0, sys.argv[1]);"
+            "from src.modules.account.registry import AccountRegistry;"
+            "AccountRegistry().touch('t0'); AccountRegistry().touch('t0')",
+            str(ROOT),
+        ],
+        cwd=workspace,
+        env={**os.environ, "TAS_HEADLESS": "1"},
+        check=True,
+    )
+
+    lines = run_tas(workspace, "--status").stdout.splitlines()
+    t0 = next(line for line in lines if line.startswith("t0 "))
+    t1 = next(line for line in lines if line.startswith("t1 "))
+    assert "最近使用" in t0 and "(共 2 次)" in t0
+    assert "最近使用" not in t1
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    scans = []
+    scan = AccountIndex._scan
+    monkeypatch.setattr(AccountIndex, "_scan", lambda self, *args: (scans.append(args), scan(self, *args)))
+    return scans
+
+
+def test_folder_lookups_use_registry(registry_workspace, scans):
+    workspace = registry_workspace
+    assert AccountIndex().find("t0") == "acc-t0"
+    assert len(scans) == 1
+    assert not (workspace / "accounts_index.json").exists()
+
+    # 新进程: 直接使用注册表中的记录, 不再扫描也不载入索引文件
+    AccountIndex._instance = None
+    index = AccountIndex()
+    assert index.find("t0") == "acc-t0" and index.find("main") == "tdata"
+    assert len(scans) == 1
+
+    index.rename("acc-t0", "acc-renamed")
+    AccountIndex._instance = None
+    assert AccountIndex().find("t0") == "acc-renamed"
+    assert len(scans) == 1
+
+    # 记录失效 (文件夹被外部改名) 时回退为扫描
+    os.rename(workspace / "tg" / "acc-renamed", workspace / "tg" / "acc-moved")
+    assert AccountIndex().find("t0") == "acc-moved"
+    assert len(scans) == 2
+
+
+def test_sync_only_when_tags_change(registry_workspace, monkeypatch):
+    registry = AccountRegistry()
+    imports = []
+    import_tags = AccountRegistry.import_tags
+    monkeypatch.setattr(
+        AccountRegistry, "import_tags", lambda self, *args, **kwargs: (imports.append(1), import_tags(self, *args, **kwargs))
+    )
+
+    config = ConfigManage()
+    config.workers = 3
+    config.flush()
+    registry.sync()
+    assert imports == []
+
+    config.tags = [*config.tags, "t2"]
+    config.flush()
+    registry.sync()
+    assert imports == [1] and registry.contains("t2")
+
+
+def test_encryption_state_stored_in_registry(registry_workspace):
+    workspace = registry_workspace
+    key_datas = workspace / "tg" / "acc-t0" / "key_datas"
+    assert AESCipher.encryption_state(key_datas) is False
+    EncryptionStateCache().flush()
+    assert not (workspace / "encryption_state.json").exists()
+
+    EncryptionStateCache._instance = None
+    assert AccountRegistry().file_state(os.path.abspath(key_datas))[3] == 0
+    assert AESCipher.encryption_state(key_datas) is False
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+# @File ： test_switch_journal.py
+# @Time : 2026/10/18 23:55
+# @Author : Zropk
+"""
+切换日志的故障注入测试
+在切换过程中的每一步 (日志写入及其后的实际操作) 之后强制退出进程, 再以新进程执行恢复,
+检查各账户的文件夹与 key_datas 均回到一致状态
+"""
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import ROOT, make_workspace, run_tas
+
+PASSWORD = "pwd"
+
+# 子进程: 对日志写入与各项文件操作计数, 第 N 次完成后立即退出, 模拟进程崩溃
+_CRASH = r'''
+import os, sys
+sys.path.insert(0, sys.argv[1])
+from src.modules import ConfigManage
+from src.modules.account import account_operations, tdata_link
+from src.modules.account.account_index import AccountIndex
+from src.modules.account.switch_journal import SwitchJournal
+
+crash_at, method = int(sys.argv[2]), sys.argv[3]
+configs = ConfigManage()
+configs.pwd, configs.tag = sys.argv[4], "t0"
+if method == "restore":
+    assert account_operations.account_switch("target")
+
+count = 0
+def inject(owner, name):
+    func = getattr(owner, name)
+    def wrapper(*args, **kwargs):
+        global count
+        result = func(*args, **kwargs)
+        count += 1
+        if count == crash_at:
+            os._exit(9)
+        return result
+    setattr(owner, name, wrapper)
+
+inject(SwitchJournal, "_write")
+inject(AccountIndex, "rename")
+inject(tdata_link, "point_to")
+inject(account_operations, "open_key_datas")
+inject(account_operations, "close_key_datas")
+assert account_operations.account_switch(method)
+os._exit(0)
+'''
+
+# 子进程: 与 AccountSwitcher 启动时相同的自愈流程, 输出恢复耗时
+_RECOVER = r'''
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from src.modules import ConfigManage, AccountSwitcher
+ConfigManage().pwd = sys.argv[2]
+switcher = AccountSwitcher()
+started = time.perf_counter()
+switcher._recover()
+print(time.perf_counter() - started)
+'''
+
+# 恢复耗时上限 (秒): 测试账户很小, 主要为 scrypt 派生密钥与文件夹改名的开销
+RECOVER_BUDGET = 2.0
+
+# 子进程: 列出各账户文件夹的标记、key_datas 格式及明文摘要
+_STATE = r'''
+import hashlib, json, os, sys
+sys.path.insert(0, sys.argv[1])
+from src.modules import AESCipher, ConfigManage
+
+cipher = AESCipher(sys.argv[2])
+folders = []
+for entry in os.scandir(ConfigManage().path):
+    if not entry.is_dir(follow_symlinks=False):
+        continue
+    names = os.listdir(entry.path)
+    key_datas = os.path.join(entry.path, "key_datas")
+    file_format = AESCipher._read_format(key_datas)
+    with open(key_datas, "rb") as f:
+        data = f.read() if file_format == AESCipher.FORMAT_PLAIN else b"".join(cipher._open(f))
+    folders.append({
+        "marker": next(name for name in names if name in ("main", "t0", "t1")),
+        "format": file_format,
+        "digest": hashlib.sha256(data).hexdigest(),
+        "leftovers": [name for name in names if name.startswith("key_datas") and name != "key_datas"],
+    })
+print(json.dumps(folders))
+'''
+
+
+def _python(workspace: Path, code: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", code, str(ROOT), *args],
+        cwd=workspace,
+        env={**os.environ, "TAS_HEADLESS": "1"},
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _check_consistent(workspace: Path, digests: dict) -> None:
+    """所有账户回到静止状态: 默认账户位于 tdata, 其余账户的 key_datas 已加密且内容不变"""
+    root = workspace / "tg"
+    assert not (workspace / "switch.journal").exists()
+    assert (root / "tdata" / "main").exists()
+
+    result = _python(workspace, _STATE, PASSWORD)
+    assert result.returncode == 0, result.stderr
+    folders = json.loads(result.stdout)
+    assert sorted(folder["marker"] for folder in folders) == sorted(digests)
+    for folder in folders:
+        marker = folder["marker"]
+        assert not folder["leftovers"], f"{marker} 残留临时文件"
+        assert folder["format"] == ("plain" if marker == "main" else "v2"), f"{marker} 加密状态错误"
+        assert folder["digest"] == digests[marker]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="客户端为 shell 脚本")
+@pytest.mark.parametrize("switch_mode", ["rename", "symlink"])
+@pytest.mark.parametrize("method", ["target", "restore"])
+def test_crash_after_each_step(tmp_path, switch_mode, method):
+    crash_at = 1
+    while True:
+        workspace = make_workspace(tmp_path / f"{crash_at}", switch_mode=switch_mode)
+        accounts = {"tdata": "main", "acc-t0": "t0", "acc-t1": "t1"}
+        digests = {
+            marker: _digest((workspace / "tg" / folder / "key_datas").read_bytes())
+            for folder, marker in accounts.items()
+        }
+        assert run_tas(workspace, "-e", "-p", PASSWORD).returncode == 0
+
+        crashed = _python(workspace, _CRASH, str(crash_at), method, PASSWORD)
+        assert crashed.returncode in (0, 9), crashed.stderr
+        recovered = _python(workspace, _RECOVER, PASSWORD)
+        assert recovered.returncode == 0, recovered.stderr
+        elapsed = float(recovered.stdout.split()[-1])
+        assert elapsed < RECOVER_BUDGET, f"第 {crash_at} 步中断后恢复耗时 {elapsed:.3f}s"
+        print(f"crash_at={crash_at} recover={elapsed * 1000:.1f}ms")
+
+        # 正常完成的切换保留的会话同样由恢复流程切换回默认账户
+        _check_consistent(workspace, digests)
+
+        if crashed.returncode == 0:
+            break
+        crash_at += 1
+    assert crash_at > 2
+
+
+# 子进程: 模拟 Windows 下替换 tdata 联接的过程 (临时链接已创建, 旧联接已删除, 重命名之前) 中断
+_LINK_WINDOW = r'''
+import os, sys
+sys.path.insert(0, sys.argv[1])
+from src.modules import ConfigManage
+from src.modules.account import account_operations, tdata_link
+
+method = sys.argv[2]
+configs = ConfigManage()
+configs.pwd, configs.tag = sys.argv[3], "t0"
+if method == "restore":
+    assert account_operations.account_switch("target")
+
+create_link = tdata_link._create_link
+def crash(base, folder, link):
+    create_link(base, folder, link)
+    tdata = os.path.join(os.path.dirname(link), tdata_link.LINK_NAME)
+    if os.path.basename(link) != tdata_link.LINK_NAME and tdata_link.is_link(tdata):
+        tdata_link.remove_link(tdata)
+        os._exit(9)
+tdata_link._create_link = crash
+account_operations.account_switch(method)
+os._exit(0)
+'''
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="客户端为 shell 脚本")
+@pytest.mark.parametrize("method", ["target", "restore"])
+def test_crash_while_replacing_link(tmp_path, method):
+    workspace = make_workspace(tmp_path, switch_mode="symlink")
+    accounts = {"tdata": "main", "acc-t0": "t0", "acc-t1": "t1"}
+    digests = {
+        marker: _digest((workspace / "tg" / folder / "key_datas").read_bytes())
+        for folder, marker in accounts.items()
+    }
+    assert run_tas(workspace, "-e", "-p", PASSWORD).returncode == 0
+
+    crashed = _python(workspace, _LINK_WINDOW, method, PASSWORD)
+    assert crashed.returncode == 9, crashed.stderr
+    assert not os.path.lexists(workspace / "tg" / "tdata")
+
+    recovered = _python(workspace, _RECOVER, PASSWORD)
+    assert recovered.returncode == 0, recovered.stderr
+    _check_consistent(workspace, digests)
+    assert not [name for name in os.listdir(workspace / "tg") if name.startswith("tdata.link-")]
+
+
+# 子进程: 重命名失败 (客户端占用文件夹) 时切换提前返回
+_RENAME_FAIL = r'''
+import sys
+sys.path.insert(0, sys.argv[1])
+from src.modules import ConfigManage
+from src.modules.account import account_operations
+from src.modules.account.account_index import AccountIndex
+
+fail_at = int(sys.argv[2])
+configs = ConfigManage()
+configs.pwd, configs.tag = sys.argv[3], "t0"
+
+rename, count = AccountIndex.rename, 0
+def locked(self, src, dst):
+    global count
+    count += 1
+    if count == fail_at:
+        raise PermissionError(src)
+    rename(self, src, dst)
+AccountIndex.rename = locked
+assert not account_operations.switch_to_target(configs, account_operations.AESCipher(configs.pwd), "tdata-FAILED")
+assert not configs.decrypted and not configs.has_backup
+'''
+
+
+@pytest.mark.parametrize("fail_at", [1, 2], ids=["rename_out", "rename_in"])
+def test_failed_rename_rolls_back(tmp_path, fail_at):
+    workspace = make_workspace(tmp_path)
+    accounts = {"tdata": "main", "acc-t0": "t0", "acc-t1": "t1"}
+    digests = {
+        marker: _digest((workspace / "tg" / folder / "key_datas").read_bytes())
+        for folder, marker in accounts.items()
+    }
+    assert run_tas(workspace, "-e", "-p", PASSWORD).returncode == 0
+
+    failed = _python(workspace, _RENAME_FAIL, str(fail_at), PASSWORD)
+    assert failed.returncode == 0, failed.stderr
+    # 日志已提交, 目标账户已重新加密, 无需等待下次启动恢复
+    _check_consistent(workspace, digests)